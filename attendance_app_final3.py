@@ -1,8 +1,27 @@
+import os
 import streamlit as st
 import pandas as pd
 from datetime import date, datetime
 
+from attendance_core.auth import authenticate, credential_store
+from attendance_core.camp import CampIndex
+from attendance_core.changes import ChangeWatcher
+from attendance_core.enrollment import apply_changes, change_summary, diff_enrollment, enrollment_from_selection, unknown_courses
+from attendance_core.export import EXPORT_FORMATS, deferred_export, detailed_log_chunks, export_mime, export_name, iter_chunks
+from attendance_core.marking import EXTRA_HOUR, available_hours, delete_attendance, edit_attendance, extra_hour, submit_attendance
+from attendance_core.reports import REPORT_COLUMNS, detailed_log, summarize
+from attendance_core.rollup import status_counts
+from attendance_core.roster import RosterIndex
+from attendance_core.shortage import SHORTAGE_THRESHOLD, default_path, read_percentages, shortage_list
+from attendance_core.schema import STATUSES, coerce_frame, shared_dtypes
+from attendance_core.storage import KEY_COLUMNS, get_storage
+from attendance_core.timing import RECORDER, span, start_run
+from attendance_core.trends import DAY_BUCKET_COLUMNS, FREQUENCIES, HOUR_BUCKET_COLUMNS, day_buckets, heatmap, hour_buckets, trend
+from attendance_core.write_queue import WriteQueue
+
 st.set_page_config(page_title="FYUGP Attendance", layout="wide")
+# Timing spans recorded during this rerun are grouped under one run id.
+start_run()
 
 # ------------------- Title & Description -------------------
 st.title("\U0001F4D8 FYUGP Attendance Management System")
@@ -15,29 +34,182 @@ Welcome to the **FYUGP Attendance App**.
 """)
 
 # ------------------- Load Data -------------------
-@st.cache_data
+# Backend is picked by ATTENDANCE_BACKEND ("csv" or "sqlite"). One instance is
+# shared by all sessions so in-memory indexes (taken hours) persist across reruns.
+@st.cache_resource
+def open_storage():
+    return get_storage()
+
+storage = open_storage()
+
+# Submissions are journaled and written by one background thread in small
+# batches; anything left in the journal by a crash is written on startup.
+@st.cache_resource
+def open_writer():
+    return WriteQueue(storage, os.path.join(os.environ.get("ATTENDANCE_DATA_DIR", "."), "attendance.journal"))
+
+writer = open_writer()
+
+# Table versions live in the shared store, so caches keyed on them stay
+# correct when several app processes serve the same data. One poller per
+# process notices other workers' writes for the live views below; each rerun
+# also refreshes it once instead of querying every table's version.
+@st.cache_resource
+def open_changes():
+    return ChangeWatcher(storage)
+
+changes = open_changes()
+with span("table_versions"):
+    changes.refresh()
+
+# Each table is cached under its storage version (file mtime for CSV, a write
+# counter for SQLite), so a write only reloads the table it touched and other
+# sessions pick up the change on their next rerun.
+#
+# Cached frames are stored with compact dtypes (categorical ids sharing one
+# dictionary per domain, int8 hours), so their keys also cover the reference
+# tables those dictionaries are built from.
+REFERENCE_TABLES = ["students", "courses", "teachers"]
+
+def data_version(*names):
+    versions = changes.versions()
+    return tuple(versions[name] for name in (*names, *REFERENCE_TABLES))
+
+# Live views rerun when another session or worker writes a table they show.
+@st.fragment(run_every=2)
+def watch_changes(*names):
+    if st.session_state.rendered_versions.get(names) != data_version(*names):
+        st.rerun()
+
+def live_view(*names):
+    st.session_state.setdefault("rendered_versions", {})[names] = data_version(*names)
+    watch_changes(*names)
+
+@st.cache_data(max_entries=4)
+def load_dtypes(version):
+    return shared_dtypes(*(storage.load_table(name) for name in REFERENCE_TABLES))
+
+def compact(df):
+    return coerce_frame(df, load_dtypes(data_version()))
+
+@st.cache_data(max_entries=16)
+def load_table(name, version):
+    df = storage.load_table(name)
+    if name == "teachers":
+        # Password hashes live only in the credential store below.
+        df = df.drop(columns=["password"], errors="ignore")
+    return compact(df)
+
+# Normalized email -> user record with the salted password hash. A resource
+# (not copied per call) so a login is a single dict lookup.
+@st.cache_resource(max_entries=2)
+def load_credentials(version):
+    return credential_store(storage.load_table("teachers"))
+
+# Reports read the daily rollup (one row per student/course/day/status)
+# rather than grouping the hour-level log.
+@st.cache_data(max_entries=32)
+def query_rollup(from_date=None, to_date=None, course_ids=None, department=None, version=None):
+    return compact(storage.load_rollup(from_date=from_date, to_date=to_date, course_ids=course_ids, department=department))
+
+# Course -> enrolled students and department -> students/courses, shared by
+# the console and reports. Built once per version of students; a new version
+# of enrollment patches the latest index, so an upload only rebuilds the
+# rosters of the courses it changed.
+@st.cache_resource(max_entries=2)
+def latest_roster_index(version):
+    return {}
+
+@st.cache_resource(max_entries=2)
+def load_roster_index(version):
+    enrollment = load_table("enrollment", data_version("enrollment"))
+    latest = latest_roster_index(data_version("students"))
+    with span("roster_index", rows=len(enrollment)):
+        if "index" in latest:
+            latest["index"] = latest["index"].updated(enrollment)
+        else:
+            latest["index"] = RosterIndex(load_table("students", data_version("students")), enrollment)
+        return latest["index"]
+
+# Camp intervals merged per student for exemption lookups (console and reports).
+@st.cache_resource(max_entries=2)
+def load_camp_index(version):
+    camp_days = load_table("camp_days", version)
+    with span("camp_index", rows=len(camp_days)):
+        return CampIndex(camp_days)
+
 def load_data():
-    students = pd.read_csv("students.csv")
-    teachers = pd.read_csv("teachers.csv")
-    courses = pd.read_csv("courses.csv")
-    try:
-        enrollment = pd.read_csv("enrollment.csv")
-    except:
-        enrollment = pd.DataFrame(columns=["student_id", "course_id"])
-    try:
-        attendance = pd.read_csv("attendance.csv")
-        if "student_id" not in attendance.columns:
-            attendance.columns = ["date", "hour", "course_id", "student_id", "status", "marked_by", "extra_time", "duration"]
-        attendance["date"] = pd.to_datetime(attendance["date"], errors='coerce')
-    except:
-        attendance = pd.DataFrame(columns=["date", "hour", "course_id", "student_id", "status", "marked_by", "extra_time", "duration"])
-    try:
-        camp_days = pd.read_csv("camp_days.csv", parse_dates=["start_date", "end_date"])
-    except:
-        camp_days = pd.DataFrame(columns=["student_id", "start_date", "end_date", "activity"])
-    return students, teachers, courses, enrollment, attendance, camp_days
-
-students, teachers, courses, enrollment, attendance, camp_days = load_data()
+    with span("load_data") as timing:
+        tables = tuple(load_table(name, data_version(name))
+                       for name in ["students", "teachers", "courses", "enrollment", "camp_days"])
+        timing.rows = sum(len(df) for df in tables)
+    return tables
+
+students, teachers, courses, enrollment, camp_days = load_data()
+roster_index = load_roster_index(data_version("students", "enrollment"))
+
+# Report results are cached by their inputs; ``version`` covers every table
+# they read, so they are only recomputed after a write or a new range.
+def report_version():
+    return data_version("attendance", "enrollment", "camp_days")
+
+@st.cache_data(max_entries=4)
+def full_summary(version):
+    return status_counts(query_rollup(version=version))
+
+@st.cache_data(max_entries=16)
+def department_summary(from_date, to_date, department, all_courses, version):
+    index = load_roster_index(data_version("students", "enrollment"))
+    dept_students = index.department_students(department)
+    # all_courses: every course the department's students take, not only the major
+    course_ids = tuple(index.department_courses(department)) if all_courses else None
+    camp_index = load_camp_index(data_version("camp_days"))
+    daily = query_rollup(from_date, to_date, course_ids=course_ids, department=department, version=version)
+    return summarize(daily, dept_students, camp_index)
+
+# Trend and heatmap buckets are built per storage period (a month or an
+# archived term) and cached under that period's version, so after a write
+# only the periods it touched are rebuilt; the charts regroup these small
+# frames.
+@st.cache_data(max_entries=64)
+def period_day_buckets(from_date, to_date, version, roster_version):
+    rollup = storage.load_rollup(from_date=from_date, to_date=to_date)
+    with span("trend_buckets", rows=len(rollup)):
+        return day_buckets(rollup, load_roster_index(roster_version).students,
+                           load_camp_index(data_version("camp_days")))
+
+@st.cache_data(max_entries=64)
+def period_hour_buckets(from_date, to_date, version, roster_version):
+    attendance = storage.load_attendance(from_date=from_date, to_date=to_date,
+                                         columns=["date", "student_id", "course_id", "hour", "status"])
+    with span("hour_buckets", rows=len(attendance)):
+        return hour_buckets(attendance, load_roster_index(roster_version).students,
+                            load_camp_index(data_version("camp_days")))
+
+def period_buckets(build, columns, from_date, to_date):
+    # Buckets also depend on the students' departments and the camp days.
+    roster_version = data_version("students", "enrollment")
+    versions = (roster_version, data_version("camp_days"))
+    frames = [build(start, end, (version, versions), roster_version)
+              for start, end, version in storage.attendance_periods(from_date, to_date)]
+    frames = [frame for frame in frames if not frame.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+def trend_buckets(from_date, to_date):
+    return period_buckets(period_day_buckets, DAY_BUCKET_COLUMNS, from_date, to_date)
+
+def heatmap_buckets(from_date, to_date):
+    return period_buckets(period_hour_buckets, HOUR_BUCKET_COLUMNS, from_date, to_date)
+
+# Written by the nightly ``python -m attendance_core precompute-shortage`` job.
+@st.cache_data(max_entries=2)
+def load_percentages(path, mtime):
+    return read_percentages(path)
+
+def detailed_log_export(from_date, to_date, department, index, camp_index):
+    # Runs only when the download is clicked.
+    rows = storage.load_attendance(from_date=from_date, to_date=to_date, department=department)
+    return detailed_log_chunks(detailed_log(rows, index.department_students(department), camp_index), index.students)
 
 # ------------------- Login -------------------
 if "logged_in" not in st.session_state:
@@ -48,17 +220,13 @@ if not st.session_state.logged_in:
     email = st.sidebar.text_input("Email").strip().lower()
     password = st.sidebar.text_input("Password", type="password")
     if st.sidebar.button("Login"):
-        match = teachers[
-            (teachers["email"].str.lower().str.strip() == email) &
-            (teachers["password"].astype(str).str.strip() == password)
-        ]
-        if not match.empty:
-            user = match.iloc[0]
+        user = authenticate(load_credentials(storage.table_version("teachers")), email, password)
+        if user is not None:
             st.session_state.logged_in = True
             st.session_state.teacher_id = user["teacher_id"]
             st.session_state.teacher_name = user["name"]
             st.session_state.role = user["role"]
-            st.session_state.department = user.get("department", "")
+            st.session_state.department = user["department"]
             st.rerun()
         else:
             st.sidebar.error("Invalid credentials")
@@ -70,43 +238,85 @@ else:
             del st.session_state[k]
         st.rerun()
 
-# ------------------- Safe Date Conversion -------------------
-if not pd.api.types.is_datetime64_any_dtype(attendance["date"]):
-    attendance["date"] = pd.to_datetime(attendance["date"], errors='coerce')
-# ------------------- Upload Course Selection (Admin/Dept Admin Only) -------------------
+# ------------------- Navigation -------------------
+# Only the selected section runs on a rerun, so marking attendance does not
+# pay for the admin reports, and the reports themselves are cached by their
+# inputs (date range, department, data version).
+SECTIONS = ["📘 Take Attendance", "🏕️ Camp Days Entry", "📊 Full Attendance Summary"]
+ADMIN_SECTIONS = ["🔄 Upload Course Selection", "✏️ Edit / Delete Attendance", "📋 Consolidated Report",
+                  "⛺ Manage Camp Days", "📊 Department-wise Reports", "📈 Trends", "⚠️ Attendance Shortage", "⏱️ Performance"]
+
 if st.session_state.role in ["admin", "dept_admin"]:
+    SECTIONS = SECTIONS + ADMIN_SECTIONS
+section = st.sidebar.radio("Section", SECTIONS, key="section")
+
+# ------------------- Upload Course Selection (Admin/Dept Admin Only) -------------------
+if section == "🔄 Upload Course Selection":
     st.subheader("🔄 Upload Student Course Selection (One Row Format)")
 
     uploaded_selection = st.file_uploader("Upload `student_course_selection.csv`", type="csv")
+    replace_all = st.radio("Mode", ["Update students in this sheet", "Replace all enrollment"],
+                           horizontal=True) == "Replace all enrollment"
 
     if uploaded_selection:
         try:
             df = pd.read_csv(uploaded_selection)
-            df.to_csv("student_course_selection.csv", index=False)
-
-            enrollment_df = df.melt(
-                id_vars=["student_id"], 
-                value_vars=["major_course", "minor1", "minor2", "mdc", "vac"],
-                var_name="course_type", 
-                value_name="course_id"
-            )[["student_id", "course_id"]].dropna()
-
-            enrollment_df.to_csv("enrollment.csv", index=False)
-
-            st.success("✅ `enrollment.csv` generated successfully!")
-            st.download_button("📥 Download enrollment.csv",
-                               data=enrollment_df.to_csv(index=False),
-                               file_name="enrollment.csv",
-                               mime="text/csv")
+            new_enrollment = enrollment_from_selection(df)
+
+            unknown = unknown_courses(new_enrollment, courses)
+            if not unknown.empty:
+                st.error(f"❌ {len(unknown)} selections name courses not in courses.csv: "
+                         f"{', '.join(sorted(unknown['course_id'].astype(str).unique()))}")
+            else:
+                # Only the (student_id, course_id) pairs that differ are written.
+                added, removed = diff_enrollment(enrollment, new_enrollment, replace=replace_all)
+                st.write(f"{len(added)} enrollments to add, {len(removed)} to remove, "
+                         f"{pd.concat([added, removed])['student_id'].nunique()} students affected.")
+                if added.empty and removed.empty:
+                    st.info("Enrollment already matches this sheet.")
+                else:
+                    st.dataframe(change_summary(added, removed), hide_index=True)
+                    if st.button("✅ Apply Enrollment Changes"):
+                        storage.update_enrollment(added, removed)
+                        if replace_all:
+                            storage.save_table("student_course_selection", df)
+                        st.success("✅ Enrollment updated.")
+
+                # The enrollment.csv this upload results in, not just the sheet's pairs.
+                st.download_button("📥 Download resulting enrollment.csv",
+                                   data=apply_changes(enrollment, added, removed).to_csv(index=False),
+                                   file_name="enrollment.csv",
+                                   mime="text/csv")
 
         except Exception as e:
             st.error(f"❌ Failed to process file: {e}")
 # ------------------- Attendance Console for Teacher -------------------
-if st.session_state.role in ["teacher", "admin", "dept_admin"]:
+def show_finished_writes():
+    pending = st.session_state.get("pending_writes", [])
+    st.session_state.pending_writes = [(label, future) for label, future in pending if not future.done()]
+    for label, future in pending:
+        if not future.done():
+            continue
+        if future.exception() is None:
+            st.success(f"Attendance submitted successfully! ({label})")
+            st.subheader("📊 Attendance Summary (Last Submission)")
+            st.dataframe(future.result())
+        else:
+            st.error(f"❌ Error while saving attendance ({label}): {future.exception()}")
+
+@st.fragment(run_every=1)
+def watch_pending_writes():
+    if any(not future.done() for _, future in st.session_state.get("pending_writes", [])):
+        st.info("⏳ Saving attendance…")
+    else:
+        st.rerun()
+
+if section == "📘 Take Attendance":
     assigned_courses = courses[courses["teacher_id"] == st.session_state.teacher_id]
     if not assigned_courses.empty:
         st.subheader("📘 Take Attendance")
     assigned_courses = courses[courses["teacher_id"] == st.session_state.teacher_id]
+    show_finished_writes()
     if assigned_courses.empty:
         st.info("You have no assigned courses.")
     else:
@@ -115,121 +325,137 @@ if st.session_state.role in ["teacher", "admin", "dept_admin"]:
 
         selected_date = pd.to_datetime(selected_date)
 
-        attendance["date"] = pd.to_datetime(attendance["date"], errors='coerce')
-
-        taken_hours = attendance[(attendance["course_id"] == selected_course) &
-                                 (attendance["date"] == selected_date)]["hour"].tolist()
+        taken_hours = storage.taken_hours(selected_course, selected_date)
 
-        hours = [1, 2, 3, 4, 5, 6]
-        available_hours = [h for h in hours if h not in taken_hours]
-        selected_hour = st.selectbox("Hour", available_hours + ["Extra Hour"])
+        selected_hour = st.selectbox("Hour", available_hours(taken_hours) + ["Extra Hour"])
 
         extra_time = ""
         duration = ""
         if selected_hour == "Extra Hour":
-            selected_hour = 0
+            selected_hour = extra_hour(taken_hours)
             extra_time = st.text_input("Start Time (e.g., 4:00 PM)")
             duration = st.text_input("Duration (e.g., 1 hour)")
 
-        enrolled_students = enrollment[enrollment["course_id"] == selected_course]["student_id"].tolist()
-        students_list = students[students["student_id"].isin(enrolled_students)]
+        students_list = roster_index.roster(selected_course)
 
         if not students_list.empty:
+            # Students on NSS/NCC camp that day start with their camp status.
+            on_camp = load_camp_index(data_version("camp_days")).activities_on(students_list["student_id"], selected_date)
+            initial = pd.Series(on_camp, index=students_list.index).where(lambda a: a.isin(STATUSES), "P")
+            if (on_camp != "").any():
+                st.caption("🏕️ On camp: " + ", ".join(students_list["student_id"][on_camp != ""].astype(str)))
+            # One editable grid inside a form: everyone starts as Present, the
+            # teacher only changes the exceptions, and nothing reruns until submit.
             st.write("### Mark Attendance (default is Present)")
-            updated_status = {}
-
-            for _, row in students_list.iterrows():
-                status = st.selectbox(
-                    f"{row['name']} ({row['student_id']})",
-                    ["P", "A", "NSS", "NCC", "Club"],
-                    index=0,
-                    key=f"{row['student_id']}_{selected_hour}_{selected_course}"
+            with st.form(f"attendance_{selected_course}"):
+                marked = st.data_editor(
+                    students_list.assign(status=initial),
+                    column_config={
+                        "student_id": st.column_config.TextColumn("Student ID"),
+                        "name": st.column_config.TextColumn("Name"),
+                        "status": st.column_config.SelectboxColumn("Status", options=STATUSES, required=True),
+                    },
+                    disabled=["student_id", "name"],
+                    hide_index=True,
+                    key=f"grid_{selected_course}_{selected_date.date()}_{selected_hour}",
                 )
-                updated_status[row["student_id"]] = status
-
-            if st.button("✅ Submit Attendance"):
-                new_data = []
-                for sid, status in updated_status.items():
-                    new_data.append({
-                        "date": selected_date,
-                        "hour": selected_hour,
-                        "course_id": selected_course,
-                        "student_id": sid,
-                        "status": status,
-                        "marked_by": st.session_state.teacher_id,
-                        "extra_time": extra_time,
-                        "duration": duration
-                    })
-
-                if new_data:
-                    new_df = pd.DataFrame(new_data)
-                    try:
-                        existing = pd.read_csv("attendance.csv")
-                        existing["date"] = pd.to_datetime(existing["date"], errors='coerce')
-                    except FileNotFoundError:
-                        existing = pd.DataFrame(columns=["date", "hour", "course_id", "student_id", "status", "marked_by", "extra_time", "duration"])
-
-                    required_columns = ["date", "hour", "course_id", "student_id", "status", "marked_by", "extra_time", "duration"]
-                    for col in required_columns:
-                        if col not in existing.columns:
-                            existing[col] = None
-                    try:
-                        combined = pd.concat([existing, new_df], ignore_index=True)
-                        combined.to_csv("attendance.csv", index=False)
-                        st.success("Attendance submitted successfully!")
-                        st.subheader("📊 Attendance Summary (Last Submission)")
-                        st.dataframe(new_df)
-                    except Exception as e:
-                        st.error(f"❌ Error while saving attendance: {e}")
-
- #Camp Days Entry
-st.subheader("🏕️ Camp Days Entry")
-camp_student = st.selectbox("Select Student", students["student_id"].unique(), key="camp_student")
-camp_type = st.selectbox("Camp Type", ["NSS", "NCC"], key="camp_type")
-camp_start = st.date_input("Start Date", key="camp_start")
-camp_end = st.date_input("End Date", key="camp_end")
-if st.button("➕ Add Camp Days"):
-    new_camp = pd.DataFrame([[camp_student, camp_start, camp_end, camp_type]], columns=["student_id", "start_date", "end_date", "camp_type"])
-    camp_df = pd.concat([camp_df, new_camp], ignore_index=True)
-    camp_df.to_csv(camp_file, index=False)
-    st.success("✅ Camp days added.")
-
-# Delete Camp Entry
-st.subheader("🗑️ Delete Camp Days")
-if not camp_df.empty:
-    row_to_delete = st.selectbox("Select Entry to Delete", camp_df.index, key="delete_row")
-    st.write(camp_df.loc[row_to_delete])
-    if st.button("Delete Selected Entry"):
-        camp_df = camp_df.drop(index=row_to_delete)
-        camp_df.to_csv(camp_file, index=False)
-        st.success("✅ Camp day entry deleted.")
-else:
-    st.info("No camp day entries available to delete.")
-
-# ------------------- Delete Attendance Entry -------------------
-if st.session_state.role in ["admin", "dept_admin"]:
-    st.subheader("🗑️ Delete Attendance Entry")
-    date_filter = st.date_input("Filter by Date to Delete")
-    filtered = attendance[attendance["date"] == pd.to_datetime(date_filter)]
-    if not filtered.empty:
-        selected = st.selectbox("Select Record to Delete", filtered.apply(lambda x: f"{x['student_id']} - {x['status']} ({x['hour']})", axis=1).tolist())
-        if st.button("Confirm Delete"):
-            idx = filtered.index[filtered.apply(lambda x: f"{x['student_id']} - {x['status']} ({x['hour']})" == selected, axis=1)].tolist()
-            if idx:
-                attendance.drop(index=idx, inplace=True)
-                attendance.to_csv("attendance.csv", index=False)
-                st.success("Entry deleted.")
+                submitted = st.form_submit_button("✅ Submit Attendance")
+
+            if submitted:
+                try:
+                    future = submit_attendance(writer, marked, selected_date, selected_hour, selected_course,
+                                               st.session_state.teacher_id, extra_time, duration)
+                    label = f"{selected_course}, {selected_date.date()}, hour {selected_hour}"
+                    st.session_state.pending_writes.append((label, future))
+                except Exception as e:
+                    st.error(f"❌ Error while saving attendance: {e}")
+
+        if st.session_state.pending_writes:
+            watch_pending_writes()
+
+# ------------------- Camp Days Entry -------------------
+if section == "🏕️ Camp Days Entry":
+    st.subheader("🏕️ Camp Days Entry")
+    camp_student = st.selectbox("Select Student", students["student_id"].unique(), key="camp_student")
+    camp_activity = st.selectbox("Camp Type", ["NSS", "NCC"], key="camp_type")
+    camp_start = st.date_input("Start Date", key="camp_start")
+    camp_end = st.date_input("End Date", key="camp_end")
+    if st.button("➕ Add Camp Days"):
+        new_camp = pd.DataFrame([[camp_student, camp_start, camp_end, camp_activity]], columns=["student_id", "start_date", "end_date", "activity"])
+        camp_days = pd.concat([camp_days, new_camp], ignore_index=True)
+        storage.save_table("camp_days", camp_days)
+        st.success("✅ Camp days added.")
+
+    # Delete Camp Entry
+    st.subheader("🗑️ Delete Camp Days")
+    if not camp_days.empty:
+        row_to_delete = st.selectbox("Select Entry to Delete", camp_days.index, key="delete_row")
+        st.write(camp_days.loc[row_to_delete])
+        if st.button("Delete Selected Entry", key="delete_camp_entry"):
+            camp_days = camp_days.drop(index=row_to_delete)
+            storage.save_table("camp_days", camp_days)
+            st.success("✅ Camp day entry deleted.")
+    else:
+        st.info("No camp day entries available to delete.")
+
+# ------------------- Edit / Delete Attendance -------------------
+if section == "✏️ Edit / Delete Attendance":
+    st.subheader("✏️ Edit / Delete Attendance")
+    edit_date = st.date_input("Date", key="edit_date")
+    day_records = storage.load_attendance(from_date=edit_date, to_date=edit_date)
+    if day_records.empty:
+        st.info("No attendance recorded on this date.")
+    else:
+        edit_course = st.selectbox("Course", sorted(day_records["course_id"].astype(str).unique()), key="edit_course")
+        day_records = day_records[day_records["course_id"].astype(str) == edit_course]
+        hours = sorted(day_records["hour"].unique())
+        edit_hours = st.multiselect("Hours", hours, default=hours, key="edit_hours")
+        day_records = day_records[day_records["hour"].isin(edit_hours)].sort_values(["hour", "student_id"])
+        # Records are addressed by (date, hour, course_id, student_id); tick rows
+        # (or "Select all" for whole hours) and apply one action to all of them.
+        select_all = st.checkbox("Select all shown", key="edit_select_all")
+        picked = st.data_editor(
+            day_records.assign(selected=select_all)[["selected"] + KEY_COLUMNS + ["status", "marked_by"]],
+            column_config={"selected": st.column_config.CheckboxColumn("Select")},
+            disabled=KEY_COLUMNS + ["status", "marked_by"],
+            hide_index=True,
+            key=f"edit_grid_{edit_date}_{edit_course}_{'-'.join(map(str, edit_hours))}_{select_all}",
+        )
+        chosen = day_records.loc[picked.index[picked["selected"]]]
+        st.caption(f"{len(chosen)} record(s) selected")
+        new_status = st.selectbox("New Status", STATUSES, key="edit_status")
+        col_edit, col_delete = st.columns(2)
+        # Archived terms are read-only; the storage refuses the change.
+        if col_edit.button("Set Status", disabled=chosen.empty):
+            try:
+                edit_attendance(storage, chosen, new_status, st.session_state.teacher_id)
+            except ValueError as exc:
+                st.error(f"❌ {exc}")
+            else:
+                writer.request_compaction()
+                st.success(f"✅ Updated {len(chosen)} record(s) to {new_status}.")
+        if col_delete.button("Delete Selected", disabled=chosen.empty):
+            try:
+                removed = delete_attendance(storage, chosen[KEY_COLUMNS], st.session_state.teacher_id)
+            except ValueError as exc:
+                st.error(f"❌ {exc}")
+            else:
+                writer.request_compaction()
+                st.success(f"✅ Deleted {removed} record(s).")
 
 # ------------------- Full Attendance Summary -------------------
-st.subheader("📊 Full Attendance Summary")
-if not attendance.empty:
-    grouped = attendance.groupby(["student_id", "status"]).size().unstack(fill_value=0)
-    st.dataframe(grouped)
-    st.download_button("📥 Download Attendance Summary", data=grouped.to_csv().encode(), file_name="attendance_summary.csv")
-else:
-    st.info("No attendance records to display.")
-    # ------------------- Consolidated Department Report (All Courses of Students) -------------------
-if st.session_state.role in ["admin", "dept_admin"]:
+if section == "📊 Full Attendance Summary":
+    st.subheader("📊 Full Attendance Summary")
+    live_view("attendance")
+    grouped = full_summary(data_version("attendance"))
+    if not grouped.empty:
+        st.dataframe(grouped)
+        st.download_button("📥 Download Attendance Summary", data=grouped.to_csv().encode(), file_name="attendance_summary.csv")
+    else:
+        st.info("No attendance records to display.")
+
+# ------------------- Consolidated Department Report (All Courses of Students) -------------------
+if section == "📋 Consolidated Report":
     st.subheader("\U0001F4CB Consolidated Department Attendance Report")
 
     dept_id = st.session_state.department if st.session_state.role == "dept_admin" else None
@@ -239,46 +465,17 @@ if st.session_state.role in ["admin", "dept_admin"]:
     from_dt = pd.to_datetime(from_dt)
     to_dt = pd.to_datetime(to_dt)
 
-    filtered_attendance = attendance[(attendance["date"] >= from_dt) & (attendance["date"] <= to_dt)].copy()
-
-    # Remove camp day entries
-    camp_set = set()
-    for _, row in camp_days.iterrows():
-        for d in pd.date_range(row["start_date"], row["end_date"]):
-            camp_set.add((row["student_id"], d.strftime("%Y-%m-%d")))
-
-    filtered_attendance["date_str"] = filtered_attendance["date"].dt.strftime("%Y-%m-%d")
-    filtered_attendance = filtered_attendance[~filtered_attendance.apply(lambda x: (x["student_id"], x["date_str"]) in camp_set, axis=1)]
-    if filtered_attendance.empty:
+    # All courses of the department's students (not just major), camp days excluded
+    report = department_summary(from_dt, to_dt, dept_id, True, report_version())
+    if report["total"].sum() == 0:
         st.info("No attendance data found yet for this date range.")
-        st.stop()
-
-    # Get all students under department (if dept_admin) or all (if admin)
-    if dept_id:
-        dept_students = students[students["major_course"] == dept_id]
     else:
-        dept_students = students
-
-    # 🔁 NEW: All courses of students (not just major)
-    relevant_students = enrollment[enrollment["student_id"].isin(dept_students["student_id"])]
-    all_course_ids = relevant_students["course_id"].unique()
-    all_course_att = filtered_attendance[filtered_attendance["course_id"].isin(all_course_ids)]
-
-    # Summary calculation
-    summary = all_course_att.groupby("student_id")["status"].agg([
-        ("attended", lambda x: (x != "A").sum()),
-        ("total", "count")
-    ]).reset_index()
-    summary["percent"] = (summary["attended"] / summary["total"] * 100).round(1)
-
-    report = pd.merge(dept_students, summary, on="student_id", how="left").fillna(0)
-    report["attended"] = report["attended"].astype(int)
-    report["total"] = report["total"].astype(int)
-
-    st.dataframe(report[["student_id", "name", "attended", "total", "percent"]])
-    st.download_button("\U0001F4E5 Download Consolidated Report", data=report.to_csv(index=False), file_name="consolidated_report.csv", mime="text/csv")
+        st.dataframe(report[REPORT_COLUMNS])
+        report_fmt = st.selectbox("Export format", list(EXPORT_FORMATS), key="consolidated_format")
+        st.download_button("\U0001F4E5 Download Consolidated Report", data=deferred_export(iter_chunks, report, fmt=report_fmt),
+                           file_name=export_name("consolidated_report", report_fmt), mime=export_mime(report_fmt))
 # ------------------- Admin & Dept Admin Camp Day Management -------------------
-if st.session_state.role in ["admin", "dept_admin"]:
+if section == "⛺ Manage Camp Days":
     st.subheader("⛺ Manage Camp Days")
     with st.form("Add Camp Day"):
         student_id = st.selectbox("Select Student", students["student_id"])
@@ -288,7 +485,7 @@ if st.session_state.role in ["admin", "dept_admin"]:
         if st.form_submit_button("Add Camp Day"):
             new_entry = pd.DataFrame([{"student_id": student_id, "start_date": start_date, "end_date": end_date, "activity": activity}])
             camp_days = pd.concat([camp_days, new_entry], ignore_index=True)
-            camp_days.to_csv("camp_days.csv", index=False)
+            storage.save_table("camp_days", camp_days)
             st.success("Camp days added.")
 
     if not camp_days.empty:
@@ -299,56 +496,106 @@ if st.session_state.role in ["admin", "dept_admin"]:
         selected_idx = st.selectbox("Select entry to delete", camp_days_display.index.tolist())
         if st.button("Delete Selected Entry"):
             camp_days = camp_days.drop(index=selected_idx).reset_index(drop=True)
-            camp_days.to_csv("camp_days.csv", index=False)
+            storage.save_table("camp_days", camp_days)
             st.success("Selected camp entry deleted.")
 
 # ------------------- Department-wise Report -------------------
-if st.session_state.role in ["admin", "dept_admin"]:
+if section == "📊 Department-wise Reports":
     st.subheader("\U0001F4CA Department-wise Reports")
+    live_view("attendance", "enrollment", "camp_days")
     from_dt = st.date_input("From Date", value=date.today(), key="from")
     to_dt = st.date_input("To Date", value=date.today(), key="to")
 
-    try:
-        from_dt = pd.to_datetime(from_dt)
-        to_dt = pd.to_datetime(to_dt)
-        attendance["date"] = pd.to_datetime(attendance["date"], errors="coerce")
-        filtered = attendance[(attendance["date"] >= from_dt) & (attendance["date"] <= to_dt)].copy()
-    except Exception as e:
-        st.error(f"Date filtering failed: {e}")
-        filtered = pd.DataFrame()
-
-    if not filtered.empty:
-        camp_set = set()
-        for _, row in camp_days.iterrows():
-            for d in pd.date_range(row["start_date"], row["end_date"]):
-                camp_set.add((row["student_id"], d.strftime("%Y-%m-%d")))
-        filtered["date_str"] = filtered["date"].dt.strftime("%Y-%m-%d")
-        filtered = filtered[~filtered.apply(lambda x: (x["student_id"], x["date_str"]) in camp_set, axis=1)]
-
-        dept_id = st.session_state.department if st.session_state.role == "dept_admin" else None
-        if dept_id:
-            dept_students = students[students["major_course"] == dept_id]
-        else:
-            dept_students = students
-
-        final_data = filtered[filtered["student_id"].isin(dept_students["student_id"])]
-
-        summary = final_data.groupby("student_id")["status"].agg([
-            ("attended", lambda x: (x != "A").sum()),
-            ("total", "count")
-        ]).reset_index()
-        summary["percent"] = (summary["attended"] / summary["total"] * 100).round(1)
-
-        report = pd.merge(dept_students, summary, on="student_id", how="left").fillna(0)
-        report["attended"] = report["attended"].astype(int)
-        report["total"] = report["total"].astype(int)
+    dept_id = st.session_state.department if st.session_state.role == "dept_admin" else None
+    from_dt = pd.to_datetime(from_dt)
+    to_dt = pd.to_datetime(to_dt)
+    report = department_summary(from_dt, to_dt, dept_id, False, report_version())
 
+    if report["total"].sum() > 0:
         st.write("### \U0001F4CB Consolidated Department Report")
         st.dataframe(report[["student_id", "name", "total", "attended", "percent"]])
-        st.download_button("\U0001F4C5 Download Consolidated Report", report.to_csv(index=False), "consolidated_report.csv")
+        export_fmt = st.selectbox("Export format", list(EXPORT_FORMATS), key="dept_export_format")
+        st.download_button("\U0001F4C5 Download Consolidated Report", deferred_export(iter_chunks, report, fmt=export_fmt),
+                           export_name("consolidated_report", export_fmt), mime=export_mime(export_fmt), key="dept_consolidated_download")
 
-        detailed_log = pd.merge(final_data, students, on="student_id", how="left")
+        # The detailed log is loaded, merged and written chunk by chunk only when downloaded.
         st.write("### \U0001F9FE Detailed Log")
-        st.download_button("\U0001F4C5 Download Detailed Log", detailed_log.to_csv(index=False), "detailed_log.csv")
+        st.download_button("\U0001F4C5 Download Detailed Log",
+                           deferred_export(detailed_log_export, from_dt, to_dt, dept_id, roster_index,
+                                           load_camp_index(data_version("camp_days")), fmt=export_fmt),
+                           export_name("detailed_log", export_fmt), mime=export_mime(export_fmt))
+    else:
+        st.info("No attendance records in this range.")
+
+# ------------------- Trends -------------------
+if section == "📈 Trends":
+    st.subheader("📈 Attendance Trends")
+    live_view("attendance", "enrollment", "camp_days")
+    trend_from = pd.to_datetime(st.date_input("From Date", value=date.today() - pd.Timedelta(days=365), key="trend_from"))
+    trend_to = pd.to_datetime(st.date_input("To Date", value=date.today(), key="trend_to"))
+    if st.session_state.role == "dept_admin":
+        trend_dept = st.session_state.department
     else:
+        departments = sorted(roster_index.students["major_course"].dropna().astype(str).unique())
+        trend_dept = st.selectbox("Department", ["All"] + departments, key="trend_dept")
+        trend_dept = None if trend_dept == "All" else trend_dept
+    frequency = st.radio("Group by", list(FREQUENCIES), horizontal=True, key="trend_freq")
+
+    with span("trend_chart"):
+        buckets = trend_buckets(trend_from, trend_to)
+        series = trend(buckets, FREQUENCIES[frequency], trend_dept, trend_from, trend_to)
+    if series.empty:
         st.info("No attendance records in this range.")
+    else:
+        st.write(f"### {frequency} attendance %")
+        st.line_chart(series["percent"])
+
+        with span("heatmap_chart"):
+            cells = heatmap(heatmap_buckets(trend_from, trend_to), trend_dept)
+        st.write("### Attendance % by course and hour")
+        cells["hour"] = cells["hour"].astype(int).astype(str).replace(str(EXTRA_HOUR), "Extra")
+        st.vega_lite_chart(cells, {
+            "mark": "rect",
+            "encoding": {
+                "x": {"field": "hour", "type": "ordinal", "title": "Hour"},
+                "y": {"field": "course_id", "type": "nominal", "title": "Course"},
+                "color": {"field": "percent", "type": "quantitative", "title": "Attendance %"},
+                "tooltip": [{"field": f} for f in ["course_id", "hour", "attended", "total", "percent"]],
+            },
+        }, width="stretch")
+
+# ------------------- Attendance Shortage -------------------
+if section == "⚠️ Attendance Shortage":
+    st.subheader("⚠️ Attendance Shortage")
+    percent_path = default_path()
+    percentages = load_percentages(percent_path, os.path.getmtime(percent_path) if os.path.exists(percent_path) else None)
+    if percentages is None:
+        st.info("No precomputed percentages yet. Run `python -m attendance_core precompute-shortage`.")
+    elif percentages.empty:
+        st.info("The last precompute found no attendance records.")
+    else:
+        dept_id = st.session_state.department if st.session_state.role == "dept_admin" else None
+        st.caption(f"Cumulative attendance up to {percentages['as_of'].iloc[0]}, camp days excluded.")
+        threshold = st.number_input("Threshold (%)", min_value=0, max_value=100, value=SHORTAGE_THRESHOLD)
+        per_course = st.radio("Shortage in", ["Overall", "Any course"], horizontal=True) == "Any course"
+        shortage = shortage_list(percentages, threshold, dept_id, per_course)
+        st.write(f"{shortage['student_id'].nunique()} students below {threshold}%")
+        st.dataframe(shortage.drop(columns=["as_of"]), hide_index=True)
+        st.download_button("📥 Download Shortage List", data=shortage.to_csv(index=False).encode(),
+                           file_name="attendance_shortage.csv", mime="text/csv")
+
+# ------------------- Performance -------------------
+if section == "⏱️ Performance":
+    st.subheader("⏱️ Performance")
+    st.caption("Timing spans from recent reruns of this server process (slowest p95 first). "
+               "Set ATTENDANCE_TIMING_LOG to also append them to a JSONL file.")
+    perf = RECORDER.summary()
+    if perf.empty:
+        st.info("No timings recorded yet.")
+    else:
+        st.dataframe(perf, hide_index=True)
+        st.download_button("📥 Download Timings (JSONL)", data=RECORDER.to_jsonl().encode(),
+                           file_name="timings.jsonl", mime="application/jsonl")
+        if st.button("Clear Timings"):
+            RECORDER.clear()
+            st.rerun()
@@ -0,0 +1,22 @@
+"""Headless storage and reporting helpers for the FYUGP attendance app.
+
+Attendance is read and written through a storage backend (``get_storage()``),
+which keeps the rollup, the partitions and the hour index in step with the log.
+"""
+from attendance_core.storage import (
+    ATTENDANCE_COLUMNS,
+    KEY_COLUMNS,
+    CsvStorage,
+    file_lock,
+    filter_attendance,
+    get_storage,
+)
+
+__all__ = [
+    "ATTENDANCE_COLUMNS",
+    "KEY_COLUMNS",
+    "CsvStorage",
+    "file_lock",
+    "filter_attendance",
+    "get_storage",
+]
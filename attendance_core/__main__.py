@@ -0,0 +1,107 @@
+"""Command-line maintenance tasks: ``python -m attendance_core <command>``."""
+import argparse
+import os
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m attendance_core")
+    parser.add_argument("--data-dir", default=".", help="directory holding the CSV files")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    migrate = sub.add_parser("migrate-sqlite", help="copy the CSV tables into a SQLite database")
+    migrate.add_argument("--db", default=None, help="database path (default: <data-dir>/attendance.db)")
+
+    sub.add_parser("compact", help="fold attendance.csv into the monthly Parquet partitions")
+
+    archive = sub.add_parser("archive", help="seal past terms into compressed read-only partitions")
+    archive.add_argument("--before", default=None, help="seal the terms that ended before this date (default: today)")
+
+    pack = sub.add_parser("report-pack", help="write every department's reports into one zip")
+    pack.add_argument("--from-date", required=True)
+    pack.add_argument("--to-date", required=True)
+    pack.add_argument("--out", default="department_reports.zip")
+    pack.add_argument("--format", default="CSV", choices=["CSV", "CSV (gzip)", "Parquet"])
+    pack.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+
+    shortage = sub.add_parser("precompute-shortage", help="write attendance_percent.csv for the shortage lists")
+    shortage.add_argument("--as-of", default=None, help="count attendance up to this date (default: today)")
+    shortage.add_argument("--out", default=None, help="output path (default: <data-dir>/attendance_percent.csv)")
+
+    hashing = sub.add_parser("hash-passwords", help="replace plaintext passwords in the teachers table with salted hashes")
+    hashing.add_argument("--iterations", type=int, default=None,
+                         help="PBKDF2 iterations (default: ATTENDANCE_PASSWORD_ITERATIONS or 600000)")
+
+    serve = sub.add_parser("serve", help="run several app processes sharing one SQLite database")
+    serve.add_argument("--workers", type=int, default=2)
+    serve.add_argument("--port", type=int, default=8501, help="port of the first worker; the others follow")
+    serve.add_argument("--db", default=None, help="database path (default: ATTENDANCE_DB or <data-dir>/attendance.db)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate-sqlite":
+        from attendance_core.sqlite_storage import migrate_csv_to_sqlite
+
+        counts = migrate_csv_to_sqlite(args.data_dir, args.db)
+        for name, count in counts.items():
+            print(f"{name}: {count} rows")
+    elif args.command == "compact":
+        from attendance_core.storage import CsvStorage
+
+        written = CsvStorage(args.data_dir).compact()
+        for part, count in written.items():
+            print(f"{os.path.basename(part.path)}: {count} rows")
+        print(f"compacted into {len(written)} partitions")
+    elif args.command == "archive":
+        from attendance_core.storage import CsvStorage
+
+        try:
+            sealed = CsvStorage(args.data_dir).archive(args.before)
+        except ValueError as exc:
+            parser.error(str(exc))
+        for part, count in sealed.items():
+            print(f"{os.path.basename(part.path)}: {count} rows, {part.start:%Y-%m-%d} to {part.end:%Y-%m-%d}")
+        print(f"sealed {len(sealed)} terms")
+    elif args.command == "report-pack":
+        import time
+
+        from attendance_core.report_pack import build_report_pack
+        from attendance_core.storage import get_storage
+
+        t0 = time.perf_counter()
+        timings = build_report_pack(get_storage(data_dir=args.data_dir), args.from_date, args.to_date, args.out,
+                                    args.format, args.workers)
+        for timing in timings:
+            print(f"{timing['department']:12} {timing['students']:6} students {timing['rows']:9} rows "
+                  f"{timing['seconds']:8.3f} s")
+        print(f"wrote {args.out} ({len(timings)} departments) in {time.perf_counter() - t0:.3f} s")
+    elif args.command == "precompute-shortage":
+        from attendance_core.shortage import OVERALL, SHORTAGE_THRESHOLD, compute_percentages, default_path, write_percentages
+        from attendance_core.storage import get_storage
+
+        percentages = compute_percentages(get_storage(data_dir=args.data_dir), args.as_of)
+        out = args.out or default_path(args.data_dir)
+        write_percentages(percentages, out)
+        overall = percentages[percentages["course_id"] == OVERALL]
+        below = int((overall["percent"] < SHORTAGE_THRESHOLD).sum())
+        print(f"wrote {out}: {len(overall)} students, {below} below {SHORTAGE_THRESHOLD}% overall")
+    elif args.command == "hash-passwords":
+        from attendance_core.auth import hash_passwords
+        from attendance_core.storage import get_storage
+
+        storage = get_storage(data_dir=args.data_dir)
+        teachers, count = hash_passwords(storage.load_table("teachers"), args.iterations)
+        if count:
+            storage.save_table("teachers", teachers)
+        print(f"teachers: {count} passwords hashed")
+    elif args.command == "serve":
+        from attendance_core.serve import serve
+
+        try:
+            code = serve(args.data_dir, args.workers, args.port, db_path=args.db)
+        except FileNotFoundError as exc:
+            parser.error(str(exc))
+        raise SystemExit(code)
+
+
+if __name__ == "__main__":
+    main()
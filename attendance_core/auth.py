@@ -0,0 +1,100 @@
+"""Staff login.
+
+Passwords in teachers.csv are stored as salted PBKDF2-SHA256 hashes
+(``pbkdf2_sha256$<iterations>$<salt>$<hash>``). ``python -m attendance_core
+hash-passwords`` converts a table that still holds plaintext passwords; the
+cost is set with ``--iterations`` or ``ATTENDANCE_PASSWORD_ITERATIONS``.
+Plaintext entries keep working until then so an existing deployment can
+migrate without locking anyone out.
+
+The app builds the credential store once per version of the teachers table:
+a dict keyed by normalized email, so a login attempt is one lookup plus one
+hash instead of a scan over the table. An unknown email is checked against a
+dummy hash, so the response time does not tell which emails are registered.
+"""
+import base64
+import functools
+import hashlib
+import hmac
+import os
+
+import pandas as pd
+
+ALGORITHM = "pbkdf2_sha256"
+DEFAULT_ITERATIONS = 600_000
+USER_FIELDS = ["teacher_id", "name", "role", "department"]
+
+
+def hash_iterations():
+    return int(os.environ.get("ATTENDANCE_PASSWORD_ITERATIONS", DEFAULT_ITERATIONS))
+
+
+def normalize_email(email):
+    return str(email).strip().lower()
+
+
+def is_hashed(stored):
+    return isinstance(stored, str) and stored.startswith(ALGORITHM + "$")
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+
+
+def hash_password(password, iterations=None):
+    iterations = iterations or hash_iterations()
+    salt = os.urandom(16)
+    digest = _pbkdf2(password, salt, iterations)
+    return "$".join([ALGORITHM, str(iterations), base64.b64encode(salt).decode(), base64.b64encode(digest).decode()])
+
+
+def verify_password(password, stored):
+    if not is_hashed(stored):
+        # Legacy plaintext entry (see hash-passwords).
+        return hmac.compare_digest(str(password).encode(), str(stored).strip().encode())
+    _, iterations, salt, digest = stored.split("$")
+    expected = base64.b64decode(digest)
+    return hmac.compare_digest(_pbkdf2(password, base64.b64decode(salt), int(iterations)), expected)
+
+
+@functools.lru_cache(maxsize=4)
+def _dummy_hash(iterations):
+    return hash_password(base64.b64encode(os.urandom(12)).decode(), iterations)
+
+
+def credential_store(teachers):
+    """``{normalized email: {"password": stored hash, teacher_id, name, role, department}}``.
+
+    If an email appears more than once, the first row wins (as the old table scan did).
+    """
+    teachers = teachers.dropna(subset=["email"])
+    users = teachers.reindex(columns=USER_FIELDS)
+    users = users.astype(object).where(users.notna(), "")
+    store = {}
+    for email, stored, user in zip(teachers["email"], teachers["password"], users.to_dict("records")):
+        store.setdefault(normalize_email(email), {"password": "" if pd.isna(stored) else str(stored), **user})
+    return store
+
+
+def authenticate(store, email, password):
+    """The user record (without the password) for a correct ``email``/``password``, else ``None``."""
+    entry = store.get(normalize_email(email))
+    if not password:
+        return None
+    if entry is None:
+        verify_password(password, _dummy_hash(hash_iterations()))  # same work as a wrong password
+        return None
+    if not verify_password(password, entry["password"]):
+        return None
+    return {field: entry[field] for field in USER_FIELDS}
+
+
+def hash_passwords(teachers, iterations=None):
+    """Copy of ``teachers`` with every plaintext password replaced by its hash; returns ``(teachers, count)``."""
+    teachers = teachers.copy()
+    plaintext = teachers["password"].notna() & ~teachers["password"].map(is_hashed)
+    teachers["password"] = teachers["password"].astype(object)
+    teachers.loc[plaintext, "password"] = [
+        hash_password(str(p).strip(), iterations) for p in teachers.loc[plaintext, "password"]
+    ]
+    return teachers, int(plaintext.sum())
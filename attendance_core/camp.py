@@ -0,0 +1,185 @@
+"""Camp-day (NSS/NCC) store and exemption lookups.
+
+Attendance taken while a student is away on camp does not count towards their
+percentage. camp_days rows are normalized to one schema (``student_id,
+start_date, end_date, activity``; older rows written with ``camp_type`` are
+folded into ``activity``) and overlapping or touching intervals of the same
+student and activity are merged before they are saved.
+
+``CampIndex`` merges the intervals per student and keeps them sorted under
+one int64 key (student code, start day), so "is X exempt on D", "exempt days
+of X in a range" and the exclusion mask over a whole attendance frame are
+``searchsorted`` lookups instead of expanding every interval into days.
+"""
+import numpy as np
+import pandas as pd
+
+CAMP_COLUMNS = ["student_id", "start_date", "end_date", "activity"]
+
+# Days are packed as student_code * _STRIDE + day_number into one int64 key.
+_STRIDE = 1 << 20
+
+
+def _day_numbers(values):
+    days = pd.to_datetime(pd.Series(values), errors="coerce").to_numpy(dtype="datetime64[D]")
+    return days.astype("int64"), np.isnat(days)
+
+
+def _merge_groups(codes, starts, ends):
+    """``(order, first)``: the (code, start) sort order and where each merged interval begins in it."""
+    order = np.lexsort((starts, codes))
+    codes, starts, ends = codes[order], starts[order], ends[order]
+    if len(codes) == 0:
+        return order, np.array([], dtype=int)
+    # Running maximum of end within each student, so a long interval keeps
+    # covering the shorter ones that start inside it.
+    run_end = pd.Series(ends).groupby(codes).cummax().to_numpy()
+    new_student = np.r_[True, codes[1:] != codes[:-1]]
+    gap = np.r_[True, starts[1:] > run_end[:-1] + 1]
+    return order, np.flatnonzero(new_student | gap)
+
+
+def merge_intervals(codes, starts, ends):
+    """Merge overlapping or touching [start, end] day intervals per student code.
+
+    All arguments are int64 arrays; returns the merged (codes, starts, ends)
+    sorted by (code, start).
+    """
+    order, first = _merge_groups(codes, starts, ends)
+    codes, starts, ends = codes[order], starts[order], ends[order]
+    if len(codes) == 0:
+        return codes, starts, ends
+    return codes[first], starts[first], np.maximum.reduceat(ends, first)
+
+
+def normalize_camp_days(camp_days):
+    """camp_days in the ``CAMP_COLUMNS`` schema: dates parsed, start <= end, incomplete rows dropped."""
+    df = camp_days.copy()
+    if "camp_type" in df.columns:
+        activity = df["activity"].astype(object) if "activity" in df.columns else pd.Series(None, index=df.index, dtype=object)
+        df["activity"] = activity.where(activity.notna(), df["camp_type"].astype(object))
+    df = df.reindex(columns=CAMP_COLUMNS)
+    start = pd.to_datetime(df["start_date"], errors="coerce").dt.normalize()
+    end = pd.to_datetime(df["end_date"], errors="coerce").dt.normalize()
+    ordered = start <= end
+    df["start_date"], df["end_date"] = start.where(ordered, end), end.where(ordered, start)
+    df = df.dropna(subset=["student_id", "start_date", "end_date"])
+    df["student_id"] = df["student_id"].astype(str)
+    df["activity"] = df["activity"].astype(object).fillna("").astype(str)
+    return df.reset_index(drop=True)
+
+
+def merge_camp_days(camp_days):
+    """Normalized camp days with overlapping or touching intervals merged per student and activity."""
+    df = normalize_camp_days(camp_days)
+    if df.empty:
+        return df
+    codes, pairs = pd.factorize(pd.MultiIndex.from_frame(df[["student_id", "activity"]]))
+    starts, _ = _day_numbers(df["start_date"])
+    ends, _ = _day_numbers(df["end_date"])
+    codes, starts, ends = merge_intervals(codes.astype("int64"), starts, ends)
+    merged = pd.DataFrame({
+        "student_id": pairs.get_level_values(0)[codes],
+        "start_date": pd.to_datetime(starts.astype("datetime64[D]")),
+        "end_date": pd.to_datetime(ends.astype("datetime64[D]")),
+        "activity": pairs.get_level_values(1)[codes],
+    })
+    return merged.sort_values(["student_id", "start_date", "activity"]).reset_index(drop=True)
+
+
+class CampIndex:
+    """Camp intervals merged per student and sorted for binary search.
+
+    When intervals of different activities overlap, the merged interval keeps
+    the activity of the one that starts first.
+    """
+
+    def __init__(self, camp_days):
+        camp = normalize_camp_days(camp_days)
+        self.students = pd.Index(np.sort(camp["student_id"].unique()))
+        codes = self.students.get_indexer(camp["student_id"]).astype("int64")
+        starts, _ = _day_numbers(camp["start_date"])
+        ends, _ = _day_numbers(camp["end_date"])
+        order, first = _merge_groups(codes, starts, ends)
+        codes, starts, ends = codes[order], starts[order], ends[order]
+        activities = camp["activity"].to_numpy()[order]
+        if len(codes):
+            codes, starts, ends, activities = codes[first], starts[first], np.maximum.reduceat(ends, first), activities[first]
+        self._codes, self._starts, self._ends, self._activities = codes, starts, ends, activities
+        self._keys = codes * _STRIDE + starts
+
+    @classmethod
+    def of(cls, camp_days):
+        """``camp_days`` itself if it is already an index, else an index over the frame."""
+        return camp_days if isinstance(camp_days, cls) else cls(camp_days)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _student_codes(self, student_ids):
+        # Look up each distinct id once instead of every row.
+        ids = pd.Series(student_ids).reset_index(drop=True)
+        if isinstance(ids.dtype, pd.CategoricalDtype):
+            row_codes, uniques = ids.cat.codes.to_numpy(), ids.cat.categories
+        else:
+            row_codes, uniques = pd.factorize(ids)
+        codes = np.r_[self.students.get_indexer(pd.Index(uniques).astype(str)), -1]
+        return codes[row_codes].astype("int64")
+
+    def _lookup(self, student_ids, days):
+        """Interval position for each (student, day) pair, or -1 where the student is not on camp."""
+        codes = self._student_codes(student_ids)
+        days, bad_day = _day_numbers(days)
+        if len(self._keys) == 0:
+            return np.full(len(codes), -1)
+        pos = np.searchsorted(self._keys, codes * _STRIDE + days, side="right") - 1
+        safe = np.clip(pos, 0, None)
+        hit = (pos >= 0) & (self._codes[safe] == codes) & (days <= self._ends[safe]) & ~bad_day & (codes >= 0)
+        return np.where(hit, pos, -1)
+
+    def exempt_mask(self, student_ids, days):
+        """Boolean array, True where ``student_ids[i]`` is on camp on ``days[i]``."""
+        return self._lookup(student_ids, days) >= 0
+
+    def mask(self, frame):
+        """``exempt_mask`` over the ``student_id`` and ``date`` columns of attendance or rollup rows."""
+        if frame.empty or not len(self):
+            return np.zeros(len(frame), dtype=bool)
+        return self.exempt_mask(frame["student_id"], frame["date"])
+
+    def is_exempt(self, student_id, day):
+        return bool(self.exempt_mask([student_id], [day])[0])
+
+    def activities_on(self, student_ids, day):
+        """Camp activity of each student on ``day`` ("" for students not on camp)."""
+        student_ids = np.asarray(student_ids, dtype=object)
+        pos = self._lookup(student_ids, [day] * len(student_ids))
+        activities = np.full(len(student_ids), "", dtype=object)
+        activities[pos >= 0] = self._activities[pos[pos >= 0]]
+        return activities
+
+    def exempt_days(self, student_id, from_date, to_date):
+        """The days between ``from_date`` and ``to_date`` (inclusive) that ``student_id`` is on camp."""
+        code = self._student_codes([student_id])[0]
+        (first_day, last_day), _ = _day_numbers([from_date, to_date])
+        if code < 0 or first_day > last_day:
+            return pd.DatetimeIndex([])
+        lo = np.searchsorted(self._keys, code * _STRIDE + first_day, side="right") - 1
+        if lo < 0 or self._codes[lo] != code or self._ends[lo] < first_day:
+            lo += 1
+        hi = np.searchsorted(self._keys, code * _STRIDE + last_day, side="right")
+        days = [np.arange(max(start, first_day), min(end, last_day) + 1)
+                for start, end in zip(self._starts[lo:hi], self._ends[lo:hi])]
+        if not days:
+            return pd.DatetimeIndex([])
+        return pd.DatetimeIndex(np.concatenate(days).astype("datetime64[D]"))
+
+
+def camp_exclusion_mask(attendance, camp_days):
+    """Boolean array, True where an attendance row falls inside one of its student's camp intervals.
+
+    ``camp_days`` is a camp_days frame or a prebuilt ``CampIndex``.
+    """
+    if attendance.empty:
+        return np.zeros(len(attendance), dtype=bool)
+    return CampIndex.of(camp_days).mask(attendance)
@@ -0,0 +1,47 @@
+"""Cross-process change notification.
+
+Every write bumps the version of the table it touched in the shared store
+(SQLite's ``table_versions`` counters, or the CSV files' mtime and size), and
+the app keys its caches on those versions, so a write made by any worker
+invalidates the caches of all of them. ``ChangeWatcher`` tells open pages when
+that happens: one thread per process polls ``storage.table_versions()``, and
+open sessions compare the versions they were rendered with against its latest
+copy instead of each querying the store.
+"""
+import threading
+import time
+
+POLL_INTERVAL = 1.0
+
+
+class ChangeWatcher:
+    """Polls ``storage`` every ``interval`` seconds on a daemon thread."""
+
+    def __init__(self, storage, interval=POLL_INTERVAL):
+        self.storage = storage
+        self.interval = interval
+        self._versions = storage.table_versions()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="attendance-changes", daemon=True)
+        self._thread.start()
+
+    def versions(self):
+        """The latest ``{table: version}`` seen by the poller."""
+        return self._versions
+
+    def refresh(self):
+        """Poll now; returns the tables whose version changed."""
+        with self._lock:
+            versions = self.storage.table_versions()
+            changed = [name for name, version in versions.items() if self._versions.get(name) != version]
+            if changed:
+                self._versions = versions
+        return changed
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception:  # store briefly unavailable (e.g. locked); try again next tick
+                pass
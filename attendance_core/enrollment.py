@@ -0,0 +1,55 @@
+"""Enrollment built from the one-row-per-student course selection sheet."""
+import pandas as pd
+
+SELECTION_COLUMNS = ["major_course", "minor1", "minor2", "mdc", "vac"]
+
+
+def enrollment_from_selection(selection):
+    """(student_id, course_id) pairs from a student_course_selection sheet."""
+    return selection.melt(
+        id_vars=["student_id"],
+        value_vars=SELECTION_COLUMNS,
+        var_name="course_type",
+        value_name="course_id"
+    )[["student_id", "course_id"]].dropna()
+
+
+def unknown_courses(enrollment, courses):
+    """Rows of ``enrollment`` whose course_id is not in the courses table."""
+    return enrollment[~enrollment["course_id"].astype(str).isin(courses["course_id"].astype(str))]
+
+
+def diff_enrollment(current, new, replace=False):
+    """``(added, removed)`` pairs turning ``current`` into ``new``.
+
+    Unless ``replace``, only students present in ``new`` are compared, so a
+    sheet correcting a few students leaves everyone else's enrollment alone.
+    """
+    pairs = ["student_id", "course_id"]
+    current = current[pairs].astype(str).drop_duplicates()
+    new = new[pairs].astype(str).drop_duplicates()
+    if not replace:
+        current = current[current["student_id"].isin(new["student_id"])]
+    merged = current.merge(new, on=pairs, how="outer", indicator=True)
+    added = merged.loc[merged["_merge"] == "right_only", pairs].reset_index(drop=True)
+    removed = merged.loc[merged["_merge"] == "left_only", pairs].reset_index(drop=True)
+    return added, removed
+
+
+def apply_changes(current, added, removed):
+    """``current`` enrollment with ``removed`` pairs dropped and ``added`` pairs appended."""
+    pairs = ["student_id", "course_id"]
+    current = current[pairs].astype(str)
+    drop = pd.concat([pd.DataFrame(removed, columns=pairs), pd.DataFrame(added, columns=pairs)]).astype(str)
+    merged = current.merge(drop.drop_duplicates(), on=pairs, how="left", indicator=True)
+    kept = merged.loc[merged.pop("_merge") == "left_only"]
+    return pd.concat([kept, pd.DataFrame(added, columns=pairs)], ignore_index=True)
+
+
+def change_summary(added, removed):
+    """Per course: pairs added and removed, for the upload preview."""
+    counts = pd.concat([added.assign(change="added"), removed.assign(change="removed")])
+    if counts.empty:
+        return pd.DataFrame(columns=["course_id", "added", "removed"])
+    summary = counts.groupby(["course_id", "change"]).size().unstack(fill_value=0)
+    return summary.reindex(columns=["added", "removed"], fill_value=0).reset_index().rename_axis(columns=None)
@@ -0,0 +1,84 @@
+"""Report exports.
+
+Exports are written chunk by chunk into a temporary file instead of being
+built as one big ``to_csv()`` string, and the app only produces them when a
+download button is actually clicked. CSV can be gzip-compressed; Parquet
+needs ``pyarrow``.
+"""
+import gzip
+import tempfile
+
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+CHUNK_ROWS = 50_000
+
+
+def iter_chunks(df, chunksize=CHUNK_ROWS):
+    for start in range(0, max(len(df), 1), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def detailed_log_chunks(attendance, students, chunksize=CHUNK_ROWS):
+    """The detailed log (attendance joined with student details), one chunk at a time."""
+    for chunk in iter_chunks(attendance, chunksize):
+        yield chunk.merge(students, on="student_id", how="left")
+
+
+def _write_csv(chunks, fh):
+    header = True
+    for chunk in chunks:
+        chunk.to_csv(fh, header=header, index=False, encoding="utf-8")
+        header = False
+
+
+def _write_parquet(chunks, fh):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(fh, table.schema, compression="zstd")
+            else:
+                table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def export_file(chunks, fmt="CSV"):
+    """Write ``chunks`` (an iterable of DataFrames) in ``fmt`` to a temporary file.
+
+    Returns the open binary file rewound to the start; it is deleted when closed.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    fh = tempfile.TemporaryFile()
+    if fmt == "Parquet":
+        _write_parquet(chunks, fh)
+    elif fmt == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=fh, mode="wb") as gz:
+            _write_csv(chunks, gz)
+    else:
+        _write_csv(chunks, fh)
+    fh.seek(0)
+    return fh
+
+
+def export_name(stem, fmt):
+    return stem + EXPORT_FORMATS[fmt][0]
+
+
+def export_mime(fmt):
+    return EXPORT_FORMATS[fmt][1]
+
+
+def deferred_export(make_chunks, *args, fmt="CSV"):
+    """Zero-argument callable for ``st.download_button`` that builds the export only when clicked."""
+    return lambda: export_file(make_chunks(*args), fmt)
@@ -0,0 +1,117 @@
+"""Hours already marked per (course_id, date), for the Take Attendance console.
+
+The index is built once from the live attendance rows and then kept up to
+date by reading only the bytes appended to attendance.csv since the last
+refresh, so looking up a course and day no longer scans the attendance
+history. A tombstone in the appended bytes makes it re-read the live hours of
+that course and day; a rewritten log (compaction) or a changed partition
+directory makes the next refresh rebuild it.
+"""
+import io
+import os
+import threading
+from collections import defaultdict
+
+import pandas as pd
+
+from attendance_core.storage import ATTENDANCE_COLUMNS, TOMBSTONE
+
+INDEX_COLUMNS = ["date", "hour", "course_id", "status"]
+# Bytes remembered from the end of the indexed part of the log, to notice it
+# being replaced by a different file of at least the same size.
+_TAIL_BYTES = 64
+
+
+def _day(value):
+    return pd.to_datetime(value).strftime("%Y-%m-%d")
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+class HourIndex:
+    """(course_id, "YYYY-MM-DD") -> set of hours, shared by every session of one process.
+
+    ``load_live(columns)`` returns all live rows and ``load_live_hours(course_id, day)``
+    the live hours of one class day; both are called with the attendance lock held.
+    """
+
+    def __init__(self, load_live, load_live_hours):
+        self._load_live = load_live
+        self._load_live_hours = load_live_hours
+        self._lock = threading.Lock()
+        self._hours = defaultdict(set)
+        self._snapshot = None
+        self._log_inode = None
+        self._offset = 0
+        self._tail = b""
+
+    def _add(self, df):
+        """Index ``df``'s rows; returns the (course_id, day) pairs that had a tombstone."""
+        df = df[INDEX_COLUMNS].drop_duplicates()
+        hours = pd.to_numeric(df["hour"], errors="coerce")
+        df, hours = df[hours.notna()], hours[hours.notna()]
+        days = pd.to_datetime(df["date"], errors="coerce").dt.strftime("%Y-%m-%d")
+        deleted = set()
+        for course_id, day, hour, status in zip(df["course_id"].astype(str), days, hours, df["status"].astype(str)):
+            if not isinstance(day, str):
+                continue
+            if status == TOMBSTONE:
+                deleted.add((course_id, day))
+            else:
+                self._hours[(course_id, day)].add(int(hour))
+        return deleted
+
+    def _add_log_bytes(self, data):
+        # Only whole lines; a header row (or a legacy headerless file) parses
+        # either way because non-numeric hours are skipped.
+        end = data.rfind(b"\n") + 1
+        if end:
+            log = pd.read_csv(io.BytesIO(data[:end]), header=None, names=ATTENDANCE_COLUMNS, usecols=INDEX_COLUMNS,
+                              dtype=str, keep_default_na=False)
+            for course_id, day in self._add(log):
+                self._hours[(course_id, day)] = {int(h) for h in self._load_live_hours(course_id, day)}
+            self._offset += end
+            self._tail = (self._tail + data[:end])[-_TAIL_BYTES:]
+
+    def _continues(self, log_path, log_stat):
+        """Whether the log is still the file indexed so far, possibly with rows appended."""
+        if log_stat is None:
+            return self._log_inode is None
+        if log_stat[0] != self._log_inode or log_stat[2] < self._offset:
+            return False
+        with open(log_path, "rb") as fh:
+            fh.seek(self._offset - len(self._tail))
+            return fh.read(len(self._tail)) == self._tail
+
+    def refresh(self, log_path, snapshot_path):
+        """Bring the index in line with the files; the caller holds the attendance lock.
+
+        ``snapshot_path`` is the partition directory (or any path whose stat
+        changes when compacted history is rewritten).
+        """
+        with self._lock:
+            snapshot, log_stat = _stat(snapshot_path), _stat(log_path)
+            if snapshot != self._snapshot or not self._continues(log_path, log_stat):
+                self._hours = defaultdict(set)
+                self._add(self._load_live(INDEX_COLUMNS))
+                self._snapshot, self._log_inode = snapshot, log_stat[0] if log_stat else None
+                self._offset = log_stat[2] if log_stat else 0
+                self._tail = b""
+                if self._offset:
+                    with open(log_path, "rb") as fh:
+                        fh.seek(max(self._offset - _TAIL_BYTES, 0))
+                        self._tail = fh.read(self._offset - fh.tell())
+            elif log_stat is not None and log_stat[2] > self._offset:
+                with open(log_path, "rb") as fh:
+                    fh.seek(self._offset)
+                    self._add_log_bytes(fh.read())
+
+    def hours(self, course_id, day):
+        with self._lock:
+            return sorted(self._hours.get((str(course_id), _day(day)), ()))
@@ -0,0 +1,74 @@
+"""Taking and removing attendance."""
+import itertools
+
+import pandas as pd
+
+from attendance_core.schema import STATUSES
+
+HOURS = [1, 2, 3, 4, 5, 6]
+EXTRA_HOUR = 0
+
+
+def available_hours(taken_hours):
+    """Regular hours not yet marked for a course on a day (extra hours are always allowed)."""
+    taken = set(taken_hours)
+    return [h for h in HOURS if h not in taken]
+
+
+def extra_hour(taken_hours):
+    """Hour to record a new extra class under: ``EXTRA_HOUR`` for the day's first, then 7, 8, ...
+
+    Each extra class gets its own hour, so a second one on the same day
+    does not replace the first (attendance is upserted by key).
+    """
+    taken = set(taken_hours)
+    if EXTRA_HOUR not in taken:
+        return EXTRA_HOUR
+    return next(h for h in itertools.count(HOURS[-1] + 1) if h not in taken)
+
+
+def is_extra_hour(hour):
+    """True for the hours extra classes are recorded under (works on Series too)."""
+    return (hour == EXTRA_HOUR) | (hour > HOURS[-1])
+
+
+def build_records(marks, day, hour, course_id, marked_by, extra_time="", duration=""):
+    """Attendance rows for one class from ``marks`` (a frame with student_id and status)."""
+    unknown = set(marks["status"]) - set(STATUSES)
+    if unknown:
+        raise ValueError(f"Unknown attendance status: {', '.join(sorted(map(str, unknown)))}")
+    return pd.DataFrame({
+        "date": pd.to_datetime(day),
+        "hour": hour,
+        "course_id": course_id,
+        "student_id": marks["student_id"].astype(str).to_numpy(),
+        "status": marks["status"].astype(str).to_numpy(),
+        "marked_by": marked_by,
+        "extra_time": extra_time,
+        "duration": duration,
+    })
+
+
+def mark_attendance(storage, marks, day, hour, course_id, marked_by, extra_time="", duration=""):
+    """Record one class's attendance; returns the rows written."""
+    records = build_records(marks, day, hour, course_id, marked_by, extra_time, duration)
+    if records.empty:
+        return records
+    return storage.append_attendance(records)
+
+
+def submit_attendance(writer, marks, day, hour, course_id, marked_by, extra_time="", duration=""):
+    """Queue one class's attendance on a :class:`~attendance_core.write_queue.WriteQueue`; returns a Future."""
+    return writer.submit(build_records(marks, day, hour, course_id, marked_by, extra_time, duration))
+
+
+def edit_attendance(storage, rows, status, marked_by):
+    """Set ``status`` on existing records (rows with their full columns); returns the rows written."""
+    if status not in STATUSES:
+        raise ValueError(f"Unknown attendance status: {status}")
+    return storage.append_attendance(pd.DataFrame(rows).assign(status=status, marked_by=marked_by))
+
+
+def delete_attendance(storage, keys, deleted_by=""):
+    """Delete records by (date, hour, course_id, student_id); returns how many were removed."""
+    return storage.delete_attendance(keys, deleted_by)
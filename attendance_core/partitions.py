@@ -0,0 +1,177 @@
+"""Attendance history partitioned by month and term.
+
+Compaction folds the CSV log into ``attendance_partitions/``, one Parquet
+file per month (``month-2025-07.parquet``) rewriting only the months the log
+touched. ``python -m attendance_core archive`` seals every term that ended
+before a cut-off date: its months are merged into one read-only file
+(``term-2025-06.parquet``, chmod 444, zstd level 19) and no further marks,
+edits or deletes are accepted for its dates.
+
+The daily rollup behind the summaries is partitioned the same way in
+``attendance_daily_partitions/`` (its months and terms follow the attendance
+ones), with attendance_daily.csv as its delta log.
+
+Reads open only the partitions whose date span overlaps the requested range,
+so a report for last week reads one or two month files. Sealed terms are also
+left out of the reads that serve marking (the Take Attendance hour index),
+since nothing can be written to them any more.
+
+Terms start on the first day of the months in ``ATTENDANCE_TERM_MONTHS``
+(default ``6,12``: June-November and December-May), labelled by their first
+month. Requires ``pyarrow``.
+"""
+import os
+import re
+from typing import NamedTuple
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from attendance_core.snapshot import fsync_directory, read_snapshot, write_snapshot
+
+PARTITION_DIR = "attendance_partitions"
+ROLLUP_PARTITION_DIR = "attendance_daily_partitions"
+SEALED_COMPRESSION_LEVEL = 19
+
+_NAME = re.compile(r"^(month|term)-(\d{4})-(\d{2})\.parquet$")
+
+
+def term_start_months():
+    months = os.environ.get("ATTENDANCE_TERM_MONTHS", "6,12")
+    return sorted({int(month) for month in months.split(",") if month.strip()})
+
+
+def term_start(day):
+    """First day of the term containing ``day``."""
+    day = pd.Timestamp(day)
+    starts = term_start_months()
+    earlier = [month for month in starts if month <= day.month]
+    if earlier:
+        return pd.Timestamp(day.year, earlier[-1], 1)
+    return pd.Timestamp(day.year - 1, starts[-1], 1)
+
+
+def term_end(start):
+    """Last day of the term starting on ``start``."""
+    start = pd.Timestamp(start)
+    starts = term_start_months()
+    later = [month for month in starts if month > start.month]
+    following = pd.Timestamp(start.year, later[0], 1) if later else pd.Timestamp(start.year + 1, starts[0], 1)
+    return following - pd.Timedelta(days=1)
+
+
+class Partition(NamedTuple):
+    path: str
+    kind: str  # "month" or "term"
+    start: pd.Timestamp
+    end: pd.Timestamp
+
+    @property
+    def sealed(self):
+        return self.kind == "term"
+
+    @property
+    def label(self):
+        return self.start.strftime("%Y-%m")
+
+    def overlaps(self, from_date=None, to_date=None):
+        return ((from_date is None or self.end >= pd.Timestamp(from_date).normalize())
+                and (to_date is None or self.start <= pd.Timestamp(to_date)))
+
+    def covers(self, days):
+        """Boolean Series, True where ``days`` fall inside this partition."""
+        return days.between(self.start, self.end)
+
+
+def partition_for(directory, kind, start):
+    start = pd.Timestamp(start)
+    end = term_end(start) if kind == "term" else start + pd.offsets.MonthEnd(0)
+    return Partition(os.path.join(directory, f"{kind}-{start:%Y-%m}.parquet"), kind, start, end)
+
+
+def list_partitions(directory):
+    """Every partition in ``directory``, ordered by start date."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    parts = []
+    for name in names:
+        match = _NAME.match(name)
+        if match:
+            kind, year, month = match.groups()
+            parts.append(partition_for(directory, kind, pd.Timestamp(int(year), int(month), 1)))
+    return sorted(parts, key=lambda part: (part.start, part.kind))
+
+
+def select_partitions(parts, from_date=None, to_date=None, sealed=True):
+    """The partitions overlapping [from_date, to_date]; sealed terms only if ``sealed``."""
+    return [part for part in parts if part.overlaps(from_date, to_date) and (sealed or not part.sealed)]
+
+
+def read_partitions(parts, columns=None, from_date=None, to_date=None):
+    """Rows of ``parts`` (concatenated in order), or None if there are none."""
+    frames = []
+    for part in parts:
+        # Only partitions cut by the range need the row filter.
+        lo = from_date if from_date is not None and part.start < pd.Timestamp(from_date) else None
+        hi = to_date if to_date is not None and part.end > pd.Timestamp(to_date) else None
+        frames.append(read_snapshot(part.path, columns, lo, hi))
+    if not frames:
+        return None
+    return concat_categorical(frames)
+
+
+def concat_categorical(frames):
+    """Concatenate ``frames``, keeping columns categorical where they all are.
+
+    Each Parquet file has its own dictionary, and ``pd.concat`` turns
+    categoricals with different categories into plain strings; the union of
+    the categories keeps the ids as small codes.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    columns = frames[0].columns
+    categorical = [c for c in columns if all(isinstance(frame[c].dtype, pd.CategoricalDtype) for frame in frames)]
+    combined = pd.concat([frame.drop(columns=categorical) for frame in frames], ignore_index=True)
+    for column in categorical:
+        combined[column] = union_categoricals([frame[column] for frame in frames], ignore_order=True)
+    return combined[columns]
+
+
+def write_partition(rows, part, schema=None):
+    """Replace ``part`` with ``rows`` (removing it if empty); sealed terms are written read-only.
+
+    ``schema`` is the Parquet schema of the rows (default: attendance).
+    """
+    if rows.empty:
+        if os.path.exists(part.path):
+            os.remove(part.path)
+        return
+    directory = os.path.dirname(part.path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+        fsync_directory(directory)
+    if part.sealed:
+        write_snapshot(rows, part.path, compression_level=SEALED_COMPRESSION_LEVEL, schema=schema)
+        os.chmod(part.path, 0o444)
+    else:
+        write_snapshot(rows, part.path, schema=schema)
+
+
+def target_partitions(directory, days, layout):
+    """``{month start: partition in directory}`` for the months of ``days``.
+
+    A month goes to its term's partition if ``layout`` (the attendance
+    partitions) has that term sealed, else to its own month partition.
+    """
+    sealed = {part.start for part in layout if part.sealed}
+    targets = {}
+    for month in days.dt.to_period("M").dropna().unique():
+        start = month.start_time
+        term = term_start(start)
+        if term in sealed:
+            targets[start] = partition_for(directory, "term", term)
+        else:
+            targets[start] = partition_for(directory, "month", start)
+    return targets
@@ -0,0 +1,76 @@
+"""Department attendance reports.
+
+Pure functions over DataFrames so they can be called from the Streamlit page
+(on cached frames), from batch jobs and from benchmarks. The ``*_report``
+helpers at the bottom load what they need from a storage backend.
+"""
+import pandas as pd
+
+from attendance_core.camp import camp_exclusion_mask
+from attendance_core.rollup import student_summary
+from attendance_core.timing import span
+
+TABLES = ["students", "teachers", "courses", "enrollment", "camp_days"]
+REPORT_COLUMNS = ["student_id", "name", "attended", "total", "percent"]
+
+
+def load_tables(storage, names=TABLES):
+    return {name: storage.load_table(name) for name in names}
+
+
+def department_students(students, department=None):
+    """Students whose major is ``department``, or everyone for ``None`` (college admin)."""
+    if department:
+        return students[students["major_course"] == department]
+    return students
+
+
+def report_course_ids(dept_students, enrollment):
+    """Every course the department's students are enrolled in, not just their major."""
+    return enrollment.loc[enrollment["student_id"].isin(dept_students["student_id"]), "course_id"].unique()
+
+
+def exclude_camp_days(frame, camp_days):
+    """Drop rows (attendance or rollup) that fall on one of the student's camp days."""
+    with span("camp_exclusion", rows=len(frame)):
+        return frame[~camp_exclusion_mask(frame, camp_days)]
+
+
+def summarize(daily, dept_students, camp_days):
+    """Attended/total/percent per department student from daily rollup rows.
+
+    Students without any records in the range are listed with zeros.
+    """
+    daily = exclude_camp_days(daily, camp_days)
+    with span("summary_groupby", rows=len(daily)):
+        summary = student_summary(daily[daily["student_id"].isin(dept_students["student_id"])])
+    with span("summary_merge", rows=len(dept_students)):
+        report = pd.merge(dept_students, summary, on="student_id", how="left")
+        report = report.fillna({"attended": 0, "total": 0, "percent": 0})
+    report["attended"] = report["attended"].astype(int)
+    report["total"] = report["total"].astype(int)
+    return report
+
+
+def detailed_log(attendance, dept_students, camp_days):
+    """Hour-level records of the department's students, camp days excluded (export with detailed_log_chunks)."""
+    attendance = exclude_camp_days(attendance, camp_days)
+    return attendance[attendance["student_id"].isin(dept_students["student_id"])]
+
+
+def consolidated_report(storage, from_date, to_date, department=None, tables=None):
+    """Consolidated Department Attendance Report: all courses of the department's students."""
+    tables = tables or load_tables(storage)
+    dept_students = department_students(tables["students"], department)
+    course_ids = report_course_ids(dept_students, tables["enrollment"])
+    daily = storage.load_rollup(from_date, to_date, course_ids=course_ids, department=department)
+    return summarize(daily, dept_students, tables["camp_days"])
+
+
+def department_report(storage, from_date, to_date, department=None, tables=None):
+    """Department-wise Report: returns ``(report, detailed_log_rows)``."""
+    tables = tables or load_tables(storage)
+    dept_students = department_students(tables["students"], department)
+    daily = storage.load_rollup(from_date, to_date, department=department)
+    attendance = storage.load_attendance(from_date, to_date, department=department)
+    return summarize(daily, dept_students, tables["camp_days"]), detailed_log(attendance, dept_students, tables["camp_days"])
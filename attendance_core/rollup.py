@@ -0,0 +1,56 @@
+"""Daily attendance rollup.
+
+One row per (student_id, course_id, date, status) with the number of hours
+recorded, kept up to date by every submit and delete. Reports sum these rows
+instead of grouping the raw hour-level log, so their cost follows
+students x days in the range rather than the total number of records.
+"""
+import pandas as pd
+
+ROLLUP_KEY = ["student_id", "course_id", "date", "status"]
+ROLLUP_COLUMNS = ROLLUP_KEY + ["count"]
+
+
+def empty_rollup():
+    return pd.DataFrame(columns=ROLLUP_COLUMNS)
+
+
+def rollup_delta(attendance, sign=1):
+    """Rollup rows for ``attendance`` with counts multiplied by ``sign`` (+1 add, -1 remove)."""
+    if len(attendance) == 0:
+        return empty_rollup()
+    delta = attendance.groupby(ROLLUP_KEY, observed=True).size().rename("count").reset_index()
+    delta["count"] = delta["count"] * sign
+    return delta
+
+
+def combine(rollup):
+    """Collapse repeated keys (e.g. an append-only delta log) and drop empty rows."""
+    if rollup.empty:
+        return empty_rollup()
+    combined = rollup.groupby(ROLLUP_KEY, observed=True)["count"].sum().reset_index()
+    return combined[combined["count"] > 0].reset_index(drop=True)
+
+
+def student_summary(rollup, by="student_id"):
+    """Per-student (or per ``by`` columns) ``attended``/``total``/``percent`` as shown in the reports."""
+    by = [by] if isinstance(by, str) else list(by)
+    if rollup.empty:
+        return pd.DataFrame(columns=by + ["attended", "total", "percent"])
+    attended = rollup["count"].where(rollup["status"] != "A", 0)
+    summary = (
+        rollup.assign(attended=attended)
+        .groupby(by, observed=True)
+        .agg(attended=("attended", "sum"), total=("count", "sum"))
+        .reset_index()
+    )
+    summary["percent"] = (summary["attended"] / summary["total"] * 100).round(1)
+    return summary
+
+
+def status_counts(rollup):
+    """Student x status table of hour counts (the Full Attendance Summary)."""
+    table = rollup.pivot_table(index="student_id", columns="status", values="count", aggfunc="sum", fill_value=0,
+                               observed=True)
+    table.columns = pd.Index(table.columns.astype(str), name="status")
+    return table
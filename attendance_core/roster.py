@@ -0,0 +1,106 @@
+"""Roster index built once per version of the students table.
+
+Maps each course to its enrolled student ids (sorted) and each department
+(students' ``major_course``) to its students and to every course they take,
+with a student_id -> name/major lookup. The Take Attendance console and the
+department reports read these instead of filtering enrollment with ``isin``
+on every rerun.
+
+An enrollment upload changes only a few courses, so ``updated`` derives the
+index for the new enrollment by rebuilding just those courses' rosters.
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+
+from attendance_core.enrollment import diff_enrollment
+
+STUDENT_FIELDS = ["student_id", "name", "major_course"]
+
+
+class RosterIndex:
+    def __init__(self, students, enrollment):
+        self.students = students.reindex(columns=STUDENT_FIELDS).drop_duplicates("student_id")
+        self.students = self.students.sort_values("student_id").reset_index(drop=True)
+        self._lookup = self.students.set_index("student_id")
+        self._by_department = {
+            str(dept): rows.reset_index(drop=True)
+            for dept, rows in self.students.groupby("major_course", observed=True)
+        }
+        self._enrolled = self._enrolled_pairs(enrollment)
+        self._by_course = self._course_rosters(self._enrolled)
+        self._department_courses = self._majors_courses(self._enrolled)
+        self._all_courses = np.array(sorted(self._by_course))
+
+    def _enrolled_pairs(self, enrollment):
+        enrolled = enrollment[["course_id", "student_id"]].drop_duplicates()
+        enrolled = enrolled[enrolled["student_id"].isin(self.students["student_id"])]
+        return enrolled.sort_values(["course_id", "student_id"])
+
+    @staticmethod
+    def _course_rosters(enrolled):
+        return {
+            str(course_id): ids.to_numpy()
+            for course_id, ids in enrolled.groupby("course_id", observed=True)["student_id"]
+        }
+
+    def _majors_courses(self, enrolled):
+        majors = enrolled.merge(self.students[["student_id", "major_course"]], on="student_id")
+        return {
+            str(dept): np.sort(courses.unique().astype(str))
+            for dept, courses in majors.groupby("major_course", observed=True)["course_id"]
+        }
+
+    def updated(self, enrollment):
+        """This index for a new version of ``enrollment`` (same students).
+
+        Only the courses and departments whose pairs changed are rebuilt; every
+        other course's roster is shared with this index.
+        """
+        enrolled = self._enrolled_pairs(enrollment)
+        added, removed = diff_enrollment(self._enrolled, enrolled, replace=True)
+        if added.empty and removed.empty:
+            return self
+        changed = pd.concat([added, removed])
+        index = copy.copy(self)
+        index._enrolled = enrolled
+
+        changed_courses = set(changed["course_id"])
+        index._by_course = {course_id: ids for course_id, ids in self._by_course.items()
+                            if course_id not in changed_courses}
+        index._by_course.update(self._course_rosters(enrolled[enrolled["course_id"].astype(str).isin(changed_courses)]))
+        index._all_courses = np.array(sorted(index._by_course))
+
+        affected = self.students["student_id"].astype(str).isin(changed["student_id"])
+        departments = set(self.students.loc[affected, "major_course"].dropna().astype(str))
+        in_departments = self.students["major_course"].astype(str).isin(departments)
+        dept_ids = self.students.loc[in_departments, "student_id"]
+        index._department_courses = {dept: courses for dept, courses in self._department_courses.items()
+                                     if dept not in departments}
+        index._department_courses.update(self._majors_courses(enrolled[enrolled["student_id"].isin(dept_ids)]))
+        return index
+
+    def student_ids(self, course_id):
+        """Enrolled student ids of ``course_id``, sorted."""
+        return self._by_course.get(str(course_id), np.array([], dtype=object))
+
+    def roster(self, course_id):
+        """(student_id, name) of the students enrolled in ``course_id``, ordered by student_id."""
+        return self.lookup(self.student_ids(course_id))[["student_id", "name"]]
+
+    def lookup(self, student_ids):
+        """student_id, name and major_course for ``student_ids`` (unknown ids get NaN)."""
+        return self._lookup.reindex(pd.Index(student_ids, name="student_id")).reset_index()
+
+    def department_students(self, department=None):
+        """Students whose major is ``department``, or everyone for ``None``."""
+        if not department:
+            return self.students
+        return self._by_department.get(str(department), self.students.iloc[:0])
+
+    def department_courses(self, department=None):
+        """Every course the department's students are enrolled in, not just their major."""
+        if not department:
+            return self._all_courses
+        return self._department_courses.get(str(department), np.array([], dtype=object))
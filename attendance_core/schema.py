@@ -0,0 +1,80 @@
+"""In-memory column types.
+
+Loaded tables keep ids and statuses as categoricals instead of Python object
+strings, hours as nullable Int8, and dates as datetime64. The categories for
+student ids, course ids and teacher ids are built once from the reference
+tables and shared by every table, so merges between attendance, enrollment
+and students join on identical categorical dtypes and keep them.
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+STATUSES = ["P", "A", "NSS", "NCC", "Club"]
+
+# Column name -> shared dictionary it is encoded with.
+COLUMN_DOMAINS = {
+    "student_id": "student_id",
+    "course_id": "course_id",
+    "major_course": "course_id",
+    "department": "course_id",
+    "teacher_id": "teacher_id",
+    "marked_by": "teacher_id",
+    "status": "status",
+}
+# Low-cardinality free-text columns that get their own categories.
+LOCAL_CATEGORIES = ["extra_time", "duration", "role", "activity"]
+
+
+def _labels(series):
+    return sorted(series.dropna().astype(str).unique())
+
+
+def shared_dtypes(students, courses, teachers):
+    """Categorical dtypes for each domain in ``COLUMN_DOMAINS``, built from the reference tables."""
+    course_ids = set(_labels(courses["course_id"])) | set(_labels(students["major_course"]))
+    return {
+        "student_id": CategoricalDtype(_labels(students["student_id"])),
+        "course_id": CategoricalDtype(sorted(course_ids)),
+        "teacher_id": CategoricalDtype(_labels(teachers["teacher_id"])),
+        "status": CategoricalDtype(STATUSES),
+    }
+
+
+def as_category(series, dtype):
+    """Encode ``series`` with ``dtype``; unknown values extend the categories instead of becoming NaN."""
+    if series.dtype == dtype:
+        return series
+    if isinstance(series.dtype, CategoricalDtype):
+        # Recode the categories rather than every row (e.g. ids read from Parquet dictionaries).
+        labels = series.cat.categories.astype(str)
+        unseen = sorted(set(labels) - set(dtype.categories))
+        if unseen:
+            dtype = CategoricalDtype(list(dtype.categories) + unseen)
+        codes = np.append(dtype.categories.get_indexer(labels), -1)[series.cat.codes.to_numpy()]
+        return pd.Series(pd.Categorical.from_codes(codes, dtype=dtype), index=series.index, name=series.name)
+    values = series.astype("string")
+    unseen = sorted(set(values.dropna().unique()) - set(dtype.categories))
+    if unseen:
+        dtype = CategoricalDtype(list(dtype.categories) + unseen)
+    return values.astype(dtype)
+
+
+def coerce_frame(df, dtypes):
+    """Return ``df`` with the compact dtypes applied to every column it has."""
+    df = df.copy()
+    for col, domain in COLUMN_DOMAINS.items():
+        if col in df.columns:
+            df[col] = as_category(df[col], dtypes[domain])
+    for col in LOCAL_CATEGORIES:
+        if col in df.columns and not isinstance(df[col].dtype, CategoricalDtype):
+            df[col] = df[col].astype("category")
+    if "hour" in df.columns:
+        # Nullable: an unparseable hour stays NA rather than becoming the Extra Hour (0).
+        df["hour"] = pd.to_numeric(df["hour"], errors="coerce").astype("Int8")
+    if "count" in df.columns:
+        df["count"] = df["count"].astype("int32")
+    for col in ["date", "start_date", "end_date"]:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
@@ -0,0 +1,60 @@
+"""Multi-worker deployment.
+
+``python -m attendance_core --data-dir DIR serve --workers 4 --port 8501``
+starts four Streamlit processes on ports 8501-8504, all using the SQLite
+backend on DIR/attendance.db (or ``ATTENDANCE_DB``). Put a load balancer in
+front of them with sticky sessions (Streamlit keeps each session on one
+websocket), e.g. nginx ``upstream`` with ``ip_hash``.
+
+The workers share nothing but the database and the data directory:
+
+* SQLite runs in WAL mode and every write is one ``BEGIN IMMEDIATE``
+  transaction, so concurrent submits from different workers are serialized by
+  the database instead of overwriting each other.
+* Caches are keyed on the table versions stored in the database, and each
+  worker's ``ChangeWatcher`` (:mod:`attendance_core.changes`) picks up the
+  other workers' writes.
+* Submissions go through each worker's write queue; they share the journal
+  in the data directory, so whichever worker starts next replays anything a
+  crashed worker left pending.
+
+The CSV backend stays single-host only: it is safe across processes thanks
+to its file locks, but every worker would re-read the whole log.
+"""
+import os
+import signal
+import subprocess
+import sys
+
+DEFAULT_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "attendance_app_final3.py")
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def worker_command(app, port):
+    return [sys.executable, "-m", "streamlit", "run", app, "--server.port", str(port), "--server.headless", "true"]
+
+
+def serve(data_dir, workers=2, port=8501, app=DEFAULT_APP, db_path=None):
+    """Run ``workers`` app processes on consecutive ports until interrupted; returns the first non-zero exit code."""
+    from attendance_core.sqlite_storage import SqliteStorage
+
+    data_dir = os.path.abspath(data_dir)
+    db_path = os.path.abspath(db_path or os.environ.get("ATTENDANCE_DB", os.path.join(data_dir, "attendance.db")))
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"{db_path} does not exist; run `python -m attendance_core migrate-sqlite` first")
+    SqliteStorage(db_path)  # switches the database to WAL before the workers open it
+
+    env = {**os.environ, "ATTENDANCE_BACKEND": "sqlite", "ATTENDANCE_DATA_DIR": data_dir, "ATTENDANCE_DB": db_path}
+    procs = [subprocess.Popen(worker_command(app, port + i), env=env, cwd=data_dir) for i in range(workers)]
+    # Stop the workers on SIGTERM (e.g. from systemd) as well as Ctrl+C.
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        codes = [proc.wait() for proc in procs]
+    except KeyboardInterrupt:
+        for proc in procs:
+            proc.terminate()
+        codes = [proc.wait() for proc in procs]
+    return next((code for code in codes if code), 0)
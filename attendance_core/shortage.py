@@ -0,0 +1,64 @@
+"""Precomputed attendance percentages for shortage lists.
+
+``python -m attendance_core precompute-shortage`` computes every student's
+cumulative attendance up to a date (today by default), overall and per
+course, with camp days excluded, and writes it to attendance_percent.csv in
+the data directory. Run it nightly, e.g. from cron::
+
+    15 1 * * *  cd /srv/attendance && python -m attendance_core precompute-shortage
+
+The app's shortage view only filters this file by threshold, so it does not
+recompute anything over the full history.
+"""
+import os
+
+import pandas as pd
+
+from attendance_core.reports import exclude_camp_days, load_tables
+from attendance_core.rollup import student_summary
+
+SHORTAGE_THRESHOLD = 75
+SNAPSHOT_NAME = "attendance_percent.csv"
+# course_id value of the overall (all courses) row for each student.
+OVERALL = "ALL"
+SNAPSHOT_COLUMNS = ["student_id", "name", "major_course", "course_id", "attended", "total", "percent", "as_of"]
+
+
+def default_path(data_dir=None):
+    return os.path.join(data_dir or os.environ.get("ATTENDANCE_DATA_DIR", "."), SNAPSHOT_NAME)
+
+
+def compute_percentages(storage, as_of=None):
+    """Cumulative attended/total/percent per student, overall (course_id ``ALL``) and per course."""
+    as_of = pd.to_datetime(as_of or pd.Timestamp.today()).normalize()
+    tables = load_tables(storage, ["students", "camp_days"])
+    daily = exclude_camp_days(storage.load_rollup(to_date=as_of), tables["camp_days"])
+    overall = student_summary(daily).assign(course_id=OVERALL)
+    per_course = student_summary(daily, by=["student_id", "course_id"])
+    percentages = pd.concat([overall, per_course], ignore_index=True)
+    students = tables["students"][["student_id", "name", "major_course"]]
+    percentages = students.merge(percentages, on="student_id", how="inner")
+    percentages["as_of"] = as_of.strftime("%Y-%m-%d")
+    return percentages[SNAPSHOT_COLUMNS].sort_values(["student_id", "course_id"]).reset_index(drop=True)
+
+
+def write_percentages(percentages, path):
+    tmp_path = path + ".tmp"
+    percentages.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def read_percentages(path):
+    """The snapshot written by the nightly job, or ``None`` if it has not run yet."""
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, dtype={"student_id": str, "course_id": str, "major_course": str})
+
+
+def shortage_list(percentages, threshold=SHORTAGE_THRESHOLD, department=None, per_course=False):
+    """Rows below ``threshold`` percent, lowest first; overall rows unless ``per_course``."""
+    rows = percentages[(percentages["course_id"] != OVERALL) if per_course else (percentages["course_id"] == OVERALL)]
+    if department:
+        rows = rows[rows["major_course"] == department]
+    rows = rows[(rows["total"] > 0) & (rows["percent"] < threshold)]
+    return rows.sort_values(["percent", "student_id"]).reset_index(drop=True)
@@ -0,0 +1,105 @@
+"""Columnar snapshot files of the attendance history.
+
+``python -m attendance_core compact`` folds the CSV log into Parquet files
+(one per month, see :mod:`attendance_core.partitions`; older data
+directories have a single attendance.parquet): typed (date32 dates, int8
+hours, dictionary-encoded ids and statuses) and zstd-compressed.
+attendance.csv then only holds the rows appended since the last compaction.
+Reads can ask for a subset of columns and a date range, which pyarrow applies
+while scanning the file. The daily rollup is partitioned the same way, with
+its own schema (``rollup_schema``).
+
+Requires ``pyarrow``.
+"""
+import os
+
+import pandas as pd
+
+
+def snapshot_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("date", pa.date32()),
+        ("hour", pa.int8()),
+        ("course_id", pa.dictionary(pa.int32(), pa.string())),
+        ("student_id", pa.dictionary(pa.int32(), pa.string())),
+        ("status", pa.dictionary(pa.int8(), pa.string())),
+        ("marked_by", pa.string()),
+        ("extra_time", pa.string()),
+        ("duration", pa.string()),
+    ])
+
+
+def rollup_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("student_id", pa.dictionary(pa.int32(), pa.string())),
+        ("course_id", pa.dictionary(pa.int32(), pa.string())),
+        ("date", pa.date32()),
+        ("status", pa.dictionary(pa.int8(), pa.string())),
+        ("count", pa.int32()),
+    ])
+
+
+def _to_arrow(frame, schema):
+    import pyarrow as pa
+
+    df = frame.reindex(columns=schema.names).copy()
+    for field in schema:
+        col = df[field.name]
+        if pa.types.is_date(field.type):
+            df[field.name] = pd.to_datetime(col, errors="coerce").dt.date
+        elif pa.types.is_integer(field.type):
+            df[field.name] = pd.to_numeric(col, errors="coerce").fillna(0).astype(field.type.to_pandas_dtype())
+        else:
+            col = col.astype(object).where(col.notna(), None)
+            df[field.name] = col.map(lambda v: v if v is None else str(v))
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def fsync_directory(path):
+    """Make a rename into ``path``'s directory durable (skipped where directories cannot be opened)."""
+    try:
+        fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    except OSError:  # e.g. Windows
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_snapshot(attendance, path, compression_level=None, schema=None):
+    """Atomically and durably replace the snapshot at ``path`` with ``attendance`` (or rows of another ``schema``).
+
+    The file and the directory entry are fsynced before this returns, so
+    callers may truncate the log the rows came from afterwards.
+    """
+    import pyarrow.parquet as pq
+
+    tmp_path = path + ".tmp"
+    table = _to_arrow(attendance, snapshot_schema() if schema is None else schema)
+    with open(tmp_path, "wb") as fh:
+        pq.write_table(table, fh, compression="zstd", compression_level=compression_level)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+    fsync_directory(path)
+
+
+def read_snapshot(path, columns=None, from_date=None, to_date=None):
+    """Read the snapshot, optionally only ``columns`` and rows within [from_date, to_date]."""
+    import pyarrow.parquet as pq
+
+    filters = []
+    if from_date is not None:
+        filters.append(("date", ">=", pd.to_datetime(from_date).date()))
+    if to_date is not None:
+        filters.append(("date", "<=", pd.to_datetime(to_date).date()))
+    table = pq.read_table(path, columns=columns, filters=filters or None)
+    df = table.to_pandas(date_as_object=False)
+    if "date" in df.columns:
+        df["date"] = df["date"].astype("datetime64[ns]")
+    return df
@@ -0,0 +1,346 @@
+"""SQLite storage backend.
+
+Same interface as :class:`attendance_core.storage.CsvStorage`, backed by a
+single local database file. Attendance is keyed by
+(date, hour, course_id, student_id) and indexed for the two access paths the
+app uses: per-course lookups (Take Attendance, delete view) and per-student
+date ranges (reports). Report filters are pushed down into the WHERE clause
+instead of being applied to a full DataFrame.
+
+Writes are upserts on the primary key: submitting a key again replaces its
+status, and the daily rollup moves the old row's count to the new status in
+the same transaction.
+
+The database runs in WAL mode, so several app processes (see ``python -m
+attendance_core serve``) can share it: readers never block the single
+writer, and writers queue on the database lock instead of failing.
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+
+import pandas as pd
+
+from attendance_core.camp import merge_camp_days, normalize_camp_days
+from attendance_core.rollup import ROLLUP_COLUMNS, rollup_delta
+from attendance_core.storage import (ATTENDANCE_COLUMNS, KEY_COLUMNS, TABLE_COLUMNS, VERSIONED_TABLES, CsvStorage,
+                                     _format_attendance, file_lock)
+from attendance_core.timing import span
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attendance (
+    date TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    course_id TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    marked_by TEXT,
+    extra_time TEXT,
+    duration TEXT,
+    PRIMARY KEY (date, hour, course_id, student_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS attendance_course_date_hour ON attendance (course_id, date, hour);
+CREATE INDEX IF NOT EXISTS attendance_student_date ON attendance (student_id, date);
+CREATE TABLE IF NOT EXISTS attendance_daily (
+    student_id TEXT NOT NULL,
+    course_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    status TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (student_id, course_id, date, status)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS attendance_daily_date ON attendance_daily (date, course_id);
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+# Reference tables are replaced wholesale by save_table, so their indexes are
+# (re)created after every save.
+TABLE_INDEXES = {
+    "students": ["CREATE INDEX IF NOT EXISTS students_id ON students (student_id)",
+                 "CREATE INDEX IF NOT EXISTS students_major ON students (major_course)"],
+    "teachers": ["CREATE INDEX IF NOT EXISTS teachers_email ON teachers (email)"],
+    "courses": ["CREATE INDEX IF NOT EXISTS courses_teacher ON courses (teacher_id)"],
+    "enrollment": ["CREATE INDEX IF NOT EXISTS enrollment_course ON enrollment (course_id, student_id)",
+                   "CREATE INDEX IF NOT EXISTS enrollment_student ON enrollment (student_id)"],
+    "camp_days": ["CREATE INDEX IF NOT EXISTS camp_days_student ON camp_days (student_id, start_date)"],
+    "student_course_selection": ["CREATE INDEX IF NOT EXISTS student_course_selection_student "
+                                 "ON student_course_selection (student_id)"],
+}
+
+
+def _bump_version(con, name):
+    con.execute(
+        "INSERT INTO table_versions (name, version) VALUES (?, 1) "
+        "ON CONFLICT (name) DO UPDATE SET version = version + 1",
+        (name,),
+    )
+
+
+def _apply_rollup_delta(con, delta):
+    con.executemany(
+        "INSERT INTO attendance_daily (student_id, course_id, date, status, count) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (student_id, course_id, date, status) DO UPDATE SET count = count + excluded.count",
+        _records(delta[ROLLUP_COLUMNS]),
+    )
+    if (delta["count"] < 0).any():
+        con.execute("DELETE FROM attendance_daily WHERE count <= 0")
+
+
+def _rebuild_rollup(con):
+    con.execute("DELETE FROM attendance_daily")
+    con.execute(
+        "INSERT INTO attendance_daily (student_id, course_id, date, status, count) "
+        "SELECT student_id, course_id, date, status, COUNT(*) FROM attendance "
+        "GROUP BY student_id, course_id, date, status"
+    )
+
+
+KEY_FILTER = "date = ? AND hour = ? AND course_id = ? AND student_id = ?"
+
+
+# Student ids per lookup query (well under SQLite's variable limit).
+KEY_CHUNK = 500
+
+
+def _existing_rows(con, keys):
+    """Rows currently stored for ``keys`` (a frame of KEY_COLUMNS), via primary-key range lookups.
+
+    Keys are grouped by (date, hour, course_id) -- one class hour per submit --
+    and each group is one query on the primary key prefix.
+    """
+    rows = []
+    for (day, hour, course_id), students in keys.groupby(KEY_COLUMNS[:3], sort=False)["student_id"]:
+        students = students.tolist()
+        for start in range(0, len(students), KEY_CHUNK):
+            chunk = students[start:start + KEY_CHUNK]
+            rows += con.execute(
+                f"SELECT {', '.join(ATTENDANCE_COLUMNS)} FROM attendance "
+                f"WHERE date = ? AND hour = ? AND course_id = ? AND student_id IN ({', '.join('?' * len(chunk))})",
+                [day, int(hour), course_id, *chunk],
+            ).fetchall()
+    return pd.DataFrame(rows, columns=ATTENDANCE_COLUMNS)
+
+
+def _records(df):
+    """Rows of ``df`` as tuples with NaN replaced by None for sqlite3."""
+    values = df.to_numpy(dtype=object, copy=True)
+    values[pd.isna(values)] = None
+    return list(map(tuple, values))
+
+
+class SqliteStorage:
+    """Attendance data in one SQLite database file."""
+
+    backend = "sqlite"
+
+    def __init__(self, db_path="attendance.db"):
+        self.db_path = db_path
+        with self._connect() as con:
+            # Persistent for the database file; every later connection uses WAL.
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(SCHEMA)
+            # Databases migrated before the rollup table existed.
+            needs_rollup = con.execute(
+                "SELECT EXISTS (SELECT 1 FROM attendance) AND NOT EXISTS (SELECT 1 FROM attendance_daily)"
+            ).fetchone()[0]
+            if needs_rollup:
+                _rebuild_rollup(con)
+
+    @contextmanager
+    def _connect(self):
+        con = sqlite3.connect(self.db_path, timeout=30)
+        # Every commit is fsynced: the write queue marks a submission done in
+        # its journal once this returns, so a commit lost to a power failure
+        # would never be replayed. Batched submits share one fsync.
+        con.execute("PRAGMA synchronous=FULL")
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _has_table(self, con, name):
+        row = con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+        return row is not None
+
+    def table_version(self, name):
+        """Cache key for ``name``: a counter bumped in the same transaction as every write."""
+        with self._connect() as con:
+            row = con.execute("SELECT version FROM table_versions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def table_versions(self):
+        """``{table: version}`` for every table in one query."""
+        with self._connect() as con:
+            versions = dict(con.execute("SELECT name, version FROM table_versions").fetchall())
+        return {name: versions.get(name, 0) for name in VERSIONED_TABLES}
+
+    def attendance_periods(self, from_date=None, to_date=None):
+        """The whole range as one period: every write bumps the single attendance version."""
+        return [(from_date, to_date, self.table_version("attendance"))]
+
+    def load_table(self, name):
+        if name not in TABLE_COLUMNS:
+            raise KeyError(name)
+        with self._connect() as con:
+            if not self._has_table(con, name):
+                return pd.DataFrame(columns=TABLE_COLUMNS[name])
+            df = pd.read_sql_query(f"SELECT * FROM {name}", con)
+        if name == "camp_days":
+            df = normalize_camp_days(df)
+        return df
+
+    def save_table(self, name, df):
+        if name not in TABLE_COLUMNS:
+            raise KeyError(name)
+        df = merge_camp_days(df) if name == "camp_days" else df.copy()
+        for col in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = df[col].dt.strftime("%Y-%m-%d")
+        with self._connect() as con:
+            df.to_sql(name, con, if_exists="replace", index=False)
+            for statement in TABLE_INDEXES[name]:
+                con.execute(statement)
+            _bump_version(con, name)
+
+    def update_enrollment(self, added, removed):
+        """Add and remove (student_id, course_id) pairs without replacing the table."""
+        pair_filter = "student_id = ? AND course_id = ?"
+        with self._connect() as con:
+            con.execute("CREATE TABLE IF NOT EXISTS enrollment (student_id TEXT, course_id TEXT)")
+            for statement in TABLE_INDEXES["enrollment"]:
+                con.execute(statement)
+            con.executemany(f"DELETE FROM enrollment WHERE {pair_filter}", _records(pd.concat([removed, added])[TABLE_COLUMNS["enrollment"]]))
+            con.executemany("INSERT INTO enrollment (student_id, course_id) VALUES (?, ?)",
+                            _records(added[TABLE_COLUMNS["enrollment"]]))
+            _bump_version(con, "enrollment")
+
+    @staticmethod
+    def _where(from_date=None, to_date=None, course_ids=None, student_ids=None, department=None):
+        clauses, params = [], []
+        if from_date is not None:
+            clauses.append("date >= ?")
+            params.append(pd.to_datetime(from_date).strftime("%Y-%m-%d"))
+        if to_date is not None:
+            clauses.append("date <= ?")
+            params.append(pd.to_datetime(to_date).strftime("%Y-%m-%d"))
+        if course_ids is not None:
+            course_ids = list(course_ids)
+            clauses.append(f"course_id IN ({', '.join('?' * len(course_ids))})")
+            params.extend(course_ids)
+        if student_ids is not None:
+            student_ids = list(student_ids)
+            clauses.append(f"student_id IN ({', '.join('?' * len(student_ids))})")
+            params.extend(student_ids)
+        if department is not None:
+            clauses.append("student_id IN (SELECT student_id FROM students WHERE major_course = ?)")
+            params.append(department)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def load_attendance(self, from_date=None, to_date=None, course_ids=None, student_ids=None, department=None,
+                        columns=None):
+        where, params = self._where(from_date, to_date, course_ids, student_ids, department)
+        columns = [c for c in ATTENDANCE_COLUMNS if c in set(columns)] if columns is not None else ATTENDANCE_COLUMNS
+        sql = f"SELECT {', '.join(columns)} FROM attendance" + where
+        with span("load_attendance") as timing, self._connect() as con:
+            attendance = pd.read_sql_query(sql, con, params=params)
+            timing.rows = len(attendance)
+        if "date" in attendance.columns:
+            attendance["date"] = pd.to_datetime(attendance["date"], errors="coerce")
+        return attendance
+
+    def load_rollup(self, from_date=None, to_date=None, course_ids=None, student_ids=None, department=None):
+        """Daily rollup rows (see :mod:`attendance_core.rollup`) matching the report filters."""
+        where, params = self._where(from_date, to_date, course_ids, student_ids, department)
+        with span("load_rollup") as timing, self._connect() as con:
+            rollup = pd.read_sql_query(f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM attendance_daily" + where, con, params=params)
+            timing.rows = len(rollup)
+        rollup["date"] = pd.to_datetime(rollup["date"], errors="coerce")
+        return rollup
+
+    def rebuild_rollup(self):
+        with self._connect() as con:
+            _rebuild_rollup(con)
+
+    def load_roster(self, course_id):
+        """Students enrolled in ``course_id``, read through the enrollment (course_id, student_id) index."""
+        with self._connect() as con:
+            return pd.read_sql_query(
+                "SELECT s.student_id, s.name FROM enrollment e JOIN students s ON s.student_id = e.student_id "
+                "WHERE e.course_id = ? ORDER BY s.student_id",
+                con,
+                params=(course_id,),
+            )
+
+    def taken_hours(self, course_id, day):
+        with self._connect() as con:
+            rows = con.execute(
+                "SELECT DISTINCT hour FROM attendance WHERE course_id = ? AND date = ? ORDER BY hour",
+                (course_id, pd.to_datetime(day).strftime("%Y-%m-%d")),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def append_attendance(self, rows):
+        """Write ``rows``, replacing any existing records with the same key; returns the rows written."""
+        new_df = _format_attendance(rows).drop_duplicates(subset=KEY_COLUMNS, keep="last")
+        placeholders = ", ".join("?" * len(ATTENDANCE_COLUMNS))
+        updates = ", ".join(f"{c} = excluded.{c}" for c in ATTENDANCE_COLUMNS if c not in KEY_COLUMNS)
+        # Prepared outside the transaction: other workers wait while it holds the write lock.
+        records, added = _records(new_df), rollup_delta(new_df)
+        with span("write_attendance", rows=len(new_df)), self._connect() as con:
+            # Take the write lock before reading the rows being replaced, so a
+            # concurrent submit of the same keys cannot see the same old rows.
+            con.execute("BEGIN IMMEDIATE")
+            replaced = _existing_rows(con, new_df[KEY_COLUMNS])
+            con.executemany(
+                f"INSERT INTO attendance VALUES ({placeholders}) "
+                f"ON CONFLICT (date, hour, course_id, student_id) DO UPDATE SET {updates}",
+                records,
+            )
+            _apply_rollup_delta(con, pd.concat([rollup_delta(replaced, sign=-1), added]) if len(replaced) else added)
+            _bump_version(con, "attendance")
+        return new_df
+
+    def delete_attendance(self, keys, deleted_by=""):
+        """Delete the records whose (date, hour, course_id, student_id) appear in ``keys``, in place."""
+        keys = _format_attendance(pd.DataFrame(keys))[KEY_COLUMNS].drop_duplicates()
+        with span("delete_attendance", rows=len(keys)), self._connect() as con:
+            con.execute("BEGIN IMMEDIATE")
+            removed = _existing_rows(con, keys)
+            con.executemany(f"DELETE FROM attendance WHERE {KEY_FILTER}", _records(keys))
+            _apply_rollup_delta(con, rollup_delta(removed, sign=-1))
+            _bump_version(con, "attendance")
+        return len(removed)
+
+
+def migrate_csv_to_sqlite(data_dir=".", db_path=None):
+    """Copy every CSV table in ``data_dir`` into a SQLite database.
+
+    Duplicate attendance keys in the CSV log keep their last occurrence; the
+    repeated extra classes of a legacy log are first given hours of their own.
+    Returns a dict of row counts per table.
+    """
+    db_path = db_path or os.path.join(data_dir, "attendance.db")
+    src = CsvStorage(data_dir)
+    if os.path.exists(src._path("attendance")):
+        with file_lock(src._path("attendance")):
+            src._ensure_rollup_unlocked()
+    dst = SqliteStorage(db_path)
+    counts = {}
+    for name in TABLE_COLUMNS:
+        df = src.load_table(name)
+        dst.save_table(name, df)
+        counts[name] = len(df)
+    attendance = _format_attendance(src.load_attendance())
+    attendance = attendance.dropna(subset=KEY_COLUMNS).drop_duplicates(subset=KEY_COLUMNS, keep="last")
+    placeholders = ", ".join("?" * len(ATTENDANCE_COLUMNS))
+    with dst._connect() as con:
+        con.execute("DELETE FROM attendance")
+        con.executemany(f"INSERT INTO attendance VALUES ({placeholders})", _records(attendance))
+        _rebuild_rollup(con)
+        _bump_version(con, "attendance")
+    counts["attendance"] = len(attendance)
+    return counts
@@ -0,0 +1,641 @@
+"""Attendance storage.
+
+The app talks to a storage backend object (``CsvStorage`` here, or
+``SqliteStorage`` from :mod:`attendance_core.sqlite_storage`) chosen by
+``get_storage()``. Both expose the same methods so the pages never touch files
+directly.
+
+For the CSV backend, attendance.csv is treated as an append-only log (on top
+of month and term Parquet partitions, see :mod:`attendance_core.partitions`): a submit writes only its own
+rows to the end of the file instead of re-reading and rewriting the whole
+history. Writers take an exclusive lock on a sidecar ``.lock`` file so two
+teachers submitting at the same time cannot interleave or lose rows, and
+readers take a shared lock so they never see a half-written line.
+
+Each (date, hour, course_id, student_id) has at most one live record. Edits
+and deletes are appends too: the last row for a key wins when the log is
+read, and a delete appends a tombstone row (status ``TOMBSTONE``). Compaction
+folds the log into the partitions, dropping replaced rows and tombstones.
+
+camp_days is normalized on load and its overlapping intervals merged on
+save (see :mod:`attendance_core.camp`) by both backends.
+"""
+import os
+from contextlib import contextmanager
+
+import pandas as pd
+
+from attendance_core.camp import merge_camp_days, normalize_camp_days
+from attendance_core.enrollment import SELECTION_COLUMNS, apply_changes
+from attendance_core.marking import EXTRA_HOUR, extra_hour
+from attendance_core.partitions import (
+    PARTITION_DIR,
+    ROLLUP_PARTITION_DIR,
+    concat_categorical,
+    list_partitions,
+    partition_for,
+    read_partitions,
+    select_partitions,
+    target_partitions,
+    term_end,
+    term_start,
+    write_partition,
+)
+from attendance_core.rollup import combine, empty_rollup, rollup_delta
+from attendance_core.snapshot import read_snapshot, rollup_schema
+from attendance_core.timing import span
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+ATTENDANCE_COLUMNS = ["date", "hour", "course_id", "student_id", "status", "marked_by", "extra_time", "duration"]
+KEY_COLUMNS = ["date", "hour", "course_id", "student_id"]
+TOMBSTONE = "-"
+TABLE_COLUMNS = {
+    "students": ["student_id", "name", "major_course"],
+    "teachers": ["teacher_id", "name", "email", "password", "role", "department"],
+    "courses": ["course_id", "name", "teacher_id"],
+    "enrollment": ["student_id", "course_id"],
+    "camp_days": ["student_id", "start_date", "end_date", "activity"],
+    "student_course_selection": ["student_id", *SELECTION_COLUMNS],
+}
+VERSIONED_TABLES = ["attendance", *TABLE_COLUMNS]
+
+
+@contextmanager
+def file_lock(path, shared=False):
+    """Hold an advisory lock on ``path`` (via ``path.lock``) for the block."""
+    with open(path + ".lock", "a+") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _empty_attendance():
+    # Typed like a parsed log, so .dt works on it before the first write.
+    return pd.DataFrame(columns=ATTENDANCE_COLUMNS).astype({"date": "datetime64[ns]"})
+
+
+def _read_attendance_unlocked(path):
+    if not os.path.exists(path):
+        return _empty_attendance()
+    try:
+        attendance = pd.read_csv(path)
+    except pd.errors.EmptyDataError:
+        return _empty_attendance()
+    if "student_id" not in attendance.columns:
+        attendance.columns = ATTENDANCE_COLUMNS
+    attendance["date"] = pd.to_datetime(attendance["date"], errors="coerce")
+    return attendance
+
+
+def _replace_csv_unlocked(df, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="") as fh:
+        df.to_csv(fh, index=False)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+
+
+def _format_attendance(attendance):
+    out = pd.DataFrame(attendance).reindex(columns=ATTENDANCE_COLUMNS)
+    out["date"] = pd.to_datetime(out["date"], errors="coerce").dt.strftime("%Y-%m-%d")
+    return out
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as fh:
+        fh.seek(-1, os.SEEK_END)
+        return fh.read(1) == b"\n"
+
+
+def _append_csv_unlocked(df, path):
+    write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+    needs_newline = not write_header and not _ends_with_newline(path)
+    with open(path, "a", newline="") as fh:
+        if needs_newline:
+            fh.write("\n")
+        df.to_csv(fh, header=write_header, index=False)
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+def _truncate_unlocked(path, size):
+    """Cut ``path`` back to ``size`` bytes (``None``: the file did not exist, remove it)."""
+    if size is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path, "r+b") as fh:
+        fh.truncate(size)
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+def filter_attendance(attendance, from_date=None, to_date=None, course_ids=None, student_ids=None):
+    """Apply the report filters to an in-memory attendance frame."""
+    mask = pd.Series(True, index=attendance.index)
+    if from_date is not None:
+        mask &= attendance["date"] >= pd.to_datetime(from_date)
+    if to_date is not None:
+        mask &= attendance["date"] <= pd.to_datetime(to_date)
+    if course_ids is not None:
+        mask &= attendance["course_id"].isin(list(course_ids))
+    if student_ids is not None:
+        mask &= attendance["student_id"].isin(list(student_ids))
+    return attendance[mask]
+
+
+def _key_frame(keys):
+    keys = pd.DataFrame(keys)[KEY_COLUMNS].drop_duplicates()
+    keys["date"] = pd.to_datetime(keys["date"]).astype("datetime64[ns]")
+    keys["hour"] = pd.to_numeric(keys["hour"])
+    return keys
+
+
+def _split_by_keys(attendance, keys):
+    """(kept, removed) rows of ``attendance`` by whether their key is in ``keys``."""
+    attendance = attendance.assign(date=attendance["date"].astype("datetime64[ns]"))
+    merged = attendance.merge(keys, on=KEY_COLUMNS, how="left", indicator=True)
+    in_keys = merged.pop("_merge") == "both"
+    return merged[~in_keys], merged[in_keys]
+
+
+def _add_counts(history, delta):
+    """Rollup rows of ``history`` plus the signed counts in ``delta``."""
+    return combine(pd.concat([history, delta], ignore_index=True))
+
+
+def _file_version(path):
+    """``(mtime_ns, size)`` of ``path``, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _add_delta_counts(history, delta):
+    """Like ``_add_counts``, for ``history`` read from the rollup partitions.
+
+    Partitions hold one row per key already, so only the days ``delta``
+    touches are combined again; the rest keep their categorical ids.
+    """
+    if delta.empty:
+        return history.reset_index(drop=True)
+    touched = history["date"].isin(delta["date"].unique())
+    changed = _add_counts(history[touched], delta)
+    if changed.empty:
+        return history[~touched].reset_index(drop=True)
+    categorical = {c: "category" for c in changed.columns if isinstance(history[c].dtype, pd.CategoricalDtype)}
+    return concat_categorical([history[~touched], changed.astype(categorical)])
+
+
+def _number_extra_hours(attendance):
+    """``attendance`` with each extra class of a course and day under its own hour.
+
+    Logs written before extra classes were numbered (see
+    :func:`~attendance_core.marking.extra_hour`) record all of them under
+    ``EXTRA_HOUR``, where one would replace the other. Rows of one
+    (date, course_id) with another ``extra_time`` are another class and move
+    to the next free extra hour.
+    """
+    hours = pd.to_numeric(attendance["hour"], errors="coerce")
+    extra = attendance[hours == EXTRA_HOUR].assign(extra_time=lambda df: df["extra_time"].fillna("").astype(str))
+    classes = extra.drop_duplicates(["date", "course_id", "extra_time"])
+    repeated = classes[classes.duplicated(["date", "course_id"], keep=False)]
+    if repeated.empty:
+        return attendance
+    attendance = attendance.copy()
+    for (day, course_id), group in repeated.groupby(["date", "course_id"], sort=False):
+        same_class = (attendance["date"] == day) & (attendance["course_id"] == course_id)
+        taken = set(hours[same_class].dropna().astype(int))
+        for extra_time in group["extra_time"].iloc[1:]:
+            hour = extra_hour(taken)
+            taken.add(hour)
+            attendance.loc[extra.index[(extra["date"] == day) & (extra["course_id"] == course_id)
+                                       & (extra["extra_time"] == extra_time)], "hour"] = hour
+    return attendance
+
+
+def _resolve(history, delta):
+    """Live rows: the last row per key across ``history`` then ``delta``, tombstones dropped."""
+    if delta.empty:
+        return history
+    combined = delta if history.empty else pd.concat([history, delta], ignore_index=True)
+    combined = combined.drop_duplicates(subset=KEY_COLUMNS, keep="last")
+    return combined[combined["status"].astype(str) != TOMBSTONE]
+
+
+class CsvStorage:
+    """Flat CSV files in ``data_dir``, with attendance.csv as an append-only log."""
+
+    backend = "csv"
+
+    def __init__(self, data_dir="."):
+        from attendance_core.hour_index import HourIndex
+
+        self.data_dir = data_dir
+        self._hours = HourIndex(self._live_unlocked, self._live_hours_unlocked)
+        self._log_months = (None, [])
+
+    def _path(self, name):
+        return os.path.join(self.data_dir, f"{name}.csv")
+
+    @property
+    def snapshot_path(self):
+        """Single-file snapshot of older data directories; the next compaction splits it into partitions."""
+        return os.path.join(self.data_dir, "attendance.parquet")
+
+    @property
+    def partitions_dir(self):
+        return os.path.join(self.data_dir, PARTITION_DIR)
+
+    @property
+    def rollup_partitions_dir(self):
+        return os.path.join(self.data_dir, ROLLUP_PARTITION_DIR)
+
+    def table_version(self, name):
+        """Cache key for ``name``: changes whenever the file is rewritten or appended to."""
+        paths = [self._path(name)]
+        if name == "attendance":
+            # Partitions are replaced by rename, which updates the directory's mtime.
+            paths += [self.snapshot_path, self.partitions_dir, self.rollup_partitions_dir]
+        return tuple(_file_version(path) for path in paths)
+
+    def table_versions(self):
+        """``{table: version}`` for attendance and every reference table."""
+        return {name: self.table_version(name) for name in VERSIONED_TABLES}
+
+    def attendance_periods(self, from_date=None, to_date=None):
+        """``[(start, end, version)]`` splitting [from_date, to_date] for results cached per period.
+
+        Periods are the partitions (months and sealed terms), cut to the range.
+        A period's version follows its partition files, and the CSV logs too
+        while they hold rows dated in it, so a write only changes the versions
+        of the periods it touches.
+        """
+        with file_lock(self._path("attendance"), shared=True):
+            if os.path.exists(self.snapshot_path):
+                return [(from_date, to_date, self.table_version("attendance"))]
+            parts = [part for directory in (self.partitions_dir, self.rollup_partitions_dir)
+                     for part in select_partitions(list_partitions(directory), from_date, to_date)]
+            log_months, log_version = self._log_months_unlocked()
+        periods = {}
+        for part in parts:
+            periods.setdefault((part.start, part.end), []).append(_file_version(part.path))
+        for month in log_months:
+            period = next((key for key in periods if key[0] <= month <= key[1]), None)
+            periods.setdefault(period or (month, month + pd.offsets.MonthEnd(0)), []).append(log_version)
+        lo = pd.Timestamp.min if from_date is None else pd.Timestamp(from_date).normalize()
+        hi = pd.Timestamp.max if to_date is None else pd.Timestamp(to_date)
+        return [(max(start, lo), min(end, hi), tuple(version))
+                for (start, end), version in sorted(periods.items()) if end >= lo and start <= hi]
+
+    def _log_months_unlocked(self):
+        """Month starts with rows in either CSV log, and a version of both logs."""
+        paths = [self._path("attendance"), self._path("attendance_daily")]
+        version = tuple(_file_version(path) for path in paths)
+        if self._log_months[0] != version:
+            dates = []
+            if version[0] and version[0][1]:
+                # The date is the first column, also in legacy headerless logs.
+                dates.append(pd.read_csv(paths[0], header=None, usecols=[0], dtype=str)[0])
+            if version[1] and version[1][1]:
+                dates.append(pd.read_csv(paths[1], usecols=["date"], dtype=str)["date"])
+            days = pd.to_datetime(pd.concat(dates or [pd.Series(dtype=str)]), format="ISO8601", errors="coerce")
+            self._log_months = (version, sorted(days.dropna().dt.to_period("M").unique().to_timestamp()))
+        return self._log_months[1], version
+
+    def load_table(self, name):
+        path = self._path(name)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=TABLE_COLUMNS[name])
+        try:
+            df = pd.read_csv(path)
+        except pd.errors.EmptyDataError:
+            return pd.DataFrame(columns=TABLE_COLUMNS[name])
+        if name == "camp_days":
+            df = normalize_camp_days(df)
+        return df
+
+    def save_table(self, name, df):
+        if name == "camp_days":
+            df = merge_camp_days(df)
+        path = self._path(name)
+        with file_lock(path):
+            _replace_csv_unlocked(df, path)
+
+    def update_enrollment(self, added, removed):
+        """Add and remove (student_id, course_id) pairs in one locked rewrite of enrollment.csv."""
+        path = self._path("enrollment")
+        with file_lock(path):
+            _replace_csv_unlocked(apply_changes(self.load_table("enrollment"), added, removed), path)
+
+    def _department_students(self, department, student_ids):
+        if department is None:
+            return student_ids
+        students = self.load_table("students")
+        dept_ids = students.loc[students["major_course"] == department, "student_id"]
+        return dept_ids if student_ids is None else set(student_ids) & set(dept_ids)
+
+    def _read_history_unlocked(self, columns=None, from_date=None, to_date=None, sealed=True):
+        """Compacted rows from the partitions overlapping [from_date, to_date] (and a legacy snapshot), or None."""
+        parts = select_partitions(list_partitions(self.partitions_dir), from_date, to_date, sealed)
+        frames = [read_partitions(parts, columns, from_date, to_date)]
+        if os.path.exists(self.snapshot_path):
+            frames.insert(0, read_snapshot(self.snapshot_path, columns, from_date, to_date))
+        frames = [frame for frame in frames if frame is not None]
+        if not frames:
+            return None
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    def _read_all_unlocked(self, columns=None, from_date=None, to_date=None, sealed=True):
+        """Live rows from the partitions (if any) and the CSV delta log.
+
+        ``from_date``/``to_date`` only narrow the partition scan; callers filter
+        the result. ``sealed=False`` leaves out archived terms.
+        """
+        if columns is not None:
+            columns = [c for c in ATTENDANCE_COLUMNS if c in set(columns) | set(KEY_COLUMNS) | {"status"}]
+        delta = _read_attendance_unlocked(self._path("attendance"))
+        if columns is not None:
+            delta = delta[columns]
+        history = self._read_history_unlocked(columns, from_date, to_date, sealed)
+        # Legacy logs may repeat keys even without a snapshot.
+        return _resolve(delta.iloc[:0] if history is None else history, delta)
+
+    def _live_unlocked(self, columns=None):
+        # Feeds the hour index, which only serves marking: archived terms cannot be marked.
+        return self._read_all_unlocked(columns, sealed=False)
+
+    def _live_hours_unlocked(self, course_id, day):
+        rows = filter_attendance(self._read_all_unlocked(["hour", "course_id"], day, day), day, day, [course_id])
+        return rows["hour"].tolist()
+
+    def _existing_unlocked(self, keys):
+        """Live rows for ``keys`` (a frame from ``_key_frame``)."""
+        if keys.empty:
+            return _empty_attendance()
+        live = self._read_all_unlocked(None, keys["date"].min(), keys["date"].max())
+        return _format_attendance(_split_by_keys(live, keys)[1])
+
+    def load_attendance(self, from_date=None, to_date=None, course_ids=None, student_ids=None, department=None,
+                        columns=None):
+        """Attendance rows matching the filters; ``columns`` limits what is read from the snapshot."""
+        read_columns = None
+        if columns is not None:
+            filter_columns = ["date"] + ["course_id"] * (course_ids is not None)
+            filter_columns += ["student_id"] * (student_ids is not None or department is not None)
+            read_columns = [c for c in ATTENDANCE_COLUMNS if c in set(columns) | set(filter_columns)]
+        with span("load_attendance") as timing:
+            with file_lock(self._path("attendance"), shared=True):
+                attendance = self._read_all_unlocked(read_columns, from_date, to_date)
+            if read_columns is not None:
+                attendance = attendance[read_columns]
+            student_ids = self._department_students(department, student_ids)
+            attendance = filter_attendance(attendance, from_date, to_date, course_ids, student_ids)
+            timing.rows = len(attendance)
+        return attendance if columns is None else attendance[list(columns)]
+
+    def load_rollup(self, from_date=None, to_date=None, course_ids=None, student_ids=None, department=None):
+        """Daily rollup rows (see :mod:`attendance_core.rollup`) matching the report filters."""
+        path = self._path("attendance_daily")
+        if not os.path.exists(path):
+            if not os.path.exists(self._path("attendance")):
+                return empty_rollup()
+            with file_lock(self._path("attendance")):
+                self._ensure_rollup_unlocked()
+        with span("load_rollup") as timing:
+            with file_lock(self._path("attendance"), shared=True):
+                delta = self._read_rollup_log_unlocked()
+                history = self._read_rollup_history_unlocked(from_date, to_date)
+            student_ids = self._department_students(department, student_ids)
+            delta = filter_attendance(delta, from_date, to_date, course_ids, student_ids)
+            if history is None:
+                rollup = combine(delta)
+            else:
+                rollup = _add_delta_counts(filter_attendance(history, from_date, to_date, course_ids, student_ids),
+                                           delta)
+            timing.rows = len(rollup)
+        return rollup
+
+    def _read_rollup_log_unlocked(self):
+        rollup = pd.read_csv(self._path("attendance_daily"), dtype={"student_id": str, "course_id": str, "status": str})
+        rollup["date"] = pd.to_datetime(rollup["date"], errors="coerce")
+        return rollup
+
+    def _read_rollup_history_unlocked(self, from_date=None, to_date=None):
+        """Compacted rollup rows from the partitions overlapping [from_date, to_date], or None."""
+        parts = select_partitions(list_partitions(self.rollup_partitions_dir), from_date, to_date)
+        return read_partitions(parts, None, from_date, to_date)
+
+    def _rebuild_rollup_unlocked(self):
+        attendance = self._read_all_unlocked()
+        attendance["date"] = attendance["date"].dt.strftime("%Y-%m-%d")
+        # The rebuilt rollup goes back into the log; the next compaction partitions it again.
+        for part in list_partitions(self.rollup_partitions_dir):
+            os.remove(part.path)
+        _replace_csv_unlocked(combine(rollup_delta(attendance)), self._path("attendance_daily"))
+
+    def _ensure_rollup_unlocked(self):
+        # Logs written before the rollup existed get it built on first use,
+        # after their repeated extra classes are given hours of their own.
+        if not os.path.exists(self._path("attendance_daily")):
+            path = self._path("attendance")
+            attendance = _read_attendance_unlocked(path)
+            numbered = _number_extra_hours(attendance)
+            if numbered is not attendance:
+                _replace_csv_unlocked(_format_attendance(numbered), path)
+            self._rebuild_rollup_unlocked()
+
+    def rebuild_rollup(self):
+        """Recompute the rollup from the attendance rows into attendance_daily.csv, compacting its +/- delta rows."""
+        with file_lock(self._path("attendance")):
+            self._rebuild_rollup_unlocked()
+
+    def load_roster(self, course_id):
+        """Students enrolled in ``course_id`` (student_id, name), ordered by student_id."""
+        enrollment = self.load_table("enrollment")
+        students = self.load_table("students")
+        enrolled = enrollment.loc[enrollment["course_id"] == course_id, "student_id"]
+        roster = students[students["student_id"].isin(enrolled)][["student_id", "name"]]
+        return roster.sort_values("student_id").reset_index(drop=True)
+
+    def taken_hours(self, course_id, day):
+        """Hours already marked for ``course_id`` on ``day``, from the in-memory hour index."""
+        with file_lock(self._path("attendance"), shared=True):
+            self._hours.refresh(self._path("attendance"), self.partitions_dir)
+        return self._hours.hours(course_id, day)
+
+    def _append_changes_unlocked(self, rows, replaced):
+        # The rollup is an append-only log of signed count deltas, written
+        # under the attendance lock so both files always move together. If
+        # either append fails both are cut back, or a retry would count its
+        # own half-written rows as replaced.
+        paths = [self._path("attendance"), self._path("attendance_daily")]
+        sizes = [os.path.getsize(path) if os.path.exists(path) else None for path in paths]
+        delta = pd.concat([rollup_delta(replaced, sign=-1), rollup_delta(rows[rows["status"] != TOMBSTONE])])
+        try:
+            _append_csv_unlocked(rows, paths[0])
+            if not delta.empty:
+                _append_csv_unlocked(delta, paths[1])
+        except BaseException:
+            for path, size in zip(paths, sizes):
+                _truncate_unlocked(path, size)
+            raise
+
+    def _check_not_sealed_unlocked(self, days):
+        days = pd.to_datetime(pd.Series(days), errors="coerce")
+        for part in list_partitions(self.partitions_dir):
+            if part.sealed and part.covers(days).any():
+                raise ValueError(f"The {part.label} term ({part.start:%d %b %Y} - {part.end:%d %b %Y}) "
+                                 f"is archived; its attendance is read-only")
+
+    def append_attendance(self, rows):
+        """Write ``rows``, replacing any existing records with the same key; returns the rows written."""
+        new_df = _format_attendance(rows).drop_duplicates(subset=KEY_COLUMNS, keep="last")
+        with span("write_attendance", rows=len(new_df)), file_lock(self._path("attendance")):
+            self._check_not_sealed_unlocked(new_df["date"])
+            self._ensure_rollup_unlocked()
+            # Only look up the rows being replaced if one of these class
+            # hours was already marked; otherwise this is a plain append.
+            self._hours.refresh(self._path("attendance"), self.partitions_dir)
+            hours = new_df[["course_id", "date", "hour"]].drop_duplicates()
+            taken = any(int(hour) in self._hours.hours(course_id, day) for course_id, day, hour in hours.itertuples(index=False))
+            replaced = self._existing_unlocked(_key_frame(new_df)) if taken else _empty_attendance()
+            self._append_changes_unlocked(new_df, replaced)
+        return new_df
+
+    def delete_attendance(self, keys, deleted_by=""):
+        """Delete the records whose (date, hour, course_id, student_id) appear in ``keys`` (tombstones)."""
+        with span("delete_attendance") as timing, file_lock(self._path("attendance")):
+            self._check_not_sealed_unlocked(pd.DataFrame(keys)["date"])
+            self._ensure_rollup_unlocked()
+            removed = self._existing_unlocked(_key_frame(keys))
+            if not removed.empty:
+                tombstones = removed[KEY_COLUMNS].assign(status=TOMBSTONE, marked_by=deleted_by, extra_time="", duration="")
+                self._append_changes_unlocked(_format_attendance(tombstones), removed)
+            timing.rows = len(removed)
+        return len(removed)
+
+    def log_size(self):
+        """Bytes in the CSV delta log (what compaction would fold away)."""
+        try:
+            return os.path.getsize(self._path("attendance"))
+        except FileNotFoundError:
+            return 0
+
+    def _fold_unlocked(self, delta, directory, layout, merge, schema=None):
+        """Merge ``delta`` into the partitions of ``directory`` it falls in; returns ``{partition: rows}``.
+
+        ``layout`` is the attendance partitions (which terms are sealed) and
+        ``merge(history, delta)`` combines a partition's rows with its delta.
+        """
+        written = {}
+        days = delta["date"].astype("datetime64[ns]")
+        for part in dict.fromkeys(target_partitions(directory, days, layout).values()):
+            history = read_partitions([part]) if os.path.exists(part.path) else None
+            rows = merge(delta.iloc[:0] if history is None else history, delta[part.covers(days)])
+            write_partition(rows, part, schema)
+            written[part] = len(rows)
+        return written
+
+    def _seal_unlocked(self, directory, start, delta, merge, schema=None):
+        """Merge the partitions of ``directory`` in the term starting on ``start``, and the ``delta`` rows
+        dated in it, into one sealed partition; returns ``(partition, rows, delta rows outside the term)``.
+        """
+        term = partition_for(directory, "term", start)
+        parts = [part for part in list_partitions(directory) if part.start >= term.start and part.end <= term.end]
+        history = read_partitions(parts)
+        in_term = term.covers(delta["date"].astype("datetime64[ns]"))
+        rows = merge(delta.iloc[:0] if history is None else history, delta[in_term])
+        write_partition(rows, term, schema)
+        for part in parts:
+            if not part.sealed:
+                os.remove(part.path)
+        return term, len(rows), delta[~in_term]
+
+    def compact(self):
+        """Fold the CSV delta logs into the month partitions they touch and truncate the logs.
+
+        Replaced rows and tombstones are dropped, and the rollup's +/- delta
+        rows are summed into its partitions. A legacy attendance.parquet is
+        split into partitions on the way. Returns ``{partition: live rows}``
+        for the attendance partitions rewritten.
+        """
+        path = self._path("attendance")
+        with file_lock(path):
+            self._ensure_rollup_unlocked()
+            layout = list_partitions(self.partitions_dir)
+            if os.path.exists(self.snapshot_path):
+                delta = self._read_all_unlocked()
+            else:
+                delta = _read_attendance_unlocked(path).drop_duplicates(subset=KEY_COLUMNS, keep="last")
+            written = self._fold_unlocked(delta, self.partitions_dir, layout, _resolve)
+            self._fold_unlocked(self._read_rollup_log_unlocked(), self.rollup_partitions_dir, layout, _add_counts,
+                                rollup_schema())
+            _replace_csv_unlocked(_empty_attendance(), path)
+            _replace_csv_unlocked(empty_rollup(), self._path("attendance_daily"))
+            if os.path.exists(self.snapshot_path):
+                os.remove(self.snapshot_path)
+        return written
+
+    def archive(self, before=None):
+        """Seal every term that ended before ``before`` (default: today) into read-only partitions.
+
+        The term's attendance and rollup months are each merged into one
+        partition, together with their pending log rows. Returns
+        ``{partition: rows}`` for the attendance terms sealed.
+        """
+        before = pd.Timestamp(before if before is not None else pd.Timestamp.today()).normalize()
+        path = self._path("attendance")
+        with file_lock(path):
+            if os.path.exists(self.snapshot_path):
+                raise ValueError("Run `python -m attendance_core compact` first to split attendance.parquet into partitions")
+            self._ensure_rollup_unlocked()
+            delta = _read_attendance_unlocked(path).drop_duplicates(subset=KEY_COLUMNS, keep="last")
+            rollup = self._read_rollup_log_unlocked()
+            months = [part.start for directory in (self.partitions_dir, self.rollup_partitions_dir)
+                      for part in list_partitions(directory) if not part.sealed]
+            for frame in (delta, rollup):
+                months += list(frame["date"].dt.to_period("M").dropna().unique().to_timestamp())
+            sealed = {}
+            for start in sorted({term_start(month) for month in months}):
+                if term_end(start) >= before:
+                    continue
+                term, count, delta = self._seal_unlocked(self.partitions_dir, start, delta, _resolve)
+                _, _, rollup = self._seal_unlocked(self.rollup_partitions_dir, start, rollup, _add_counts, rollup_schema())
+                sealed[term] = count
+            if sealed:
+                _replace_csv_unlocked(_format_attendance(delta), path)
+                _replace_csv_unlocked(rollup.assign(date=rollup["date"].dt.strftime("%Y-%m-%d")),
+                                      self._path("attendance_daily"))
+        return sealed
+
+
+def get_storage(backend=None, data_dir=None):
+    """Return the configured backend (``ATTENDANCE_BACKEND``: ``csv`` or ``sqlite``)."""
+    backend = backend or os.environ.get("ATTENDANCE_BACKEND", "csv")
+    data_dir = data_dir or os.environ.get("ATTENDANCE_DATA_DIR", ".")
+    if backend == "csv":
+        return CsvStorage(data_dir)
+    if backend == "sqlite":
+        from attendance_core.sqlite_storage import SqliteStorage
+
+        return SqliteStorage(os.environ.get("ATTENDANCE_DB", os.path.join(data_dir, "attendance.db")))
+    raise ValueError(f"Unknown storage backend: {backend!r}")
@@ -0,0 +1,97 @@
+"""Lightweight timing spans for the hot paths.
+
+Code wraps a stage in ``with span("stage") as s: ...`` and may set
+``s.rows``. Each finished span is recorded with the id of the current run
+(one Streamlit rerun, set by ``start_run()``) in a bounded in-memory buffer
+shared by the process. The app's performance panel summarizes the buffer
+(latest and p95 per stage) and exports it as JSONL; setting
+``ATTENDANCE_TIMING_LOG`` also appends every record to that file as it is
+recorded.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+MAX_RECORDS = 10_000
+
+
+class Span:
+    __slots__ = ("rows",)
+
+    def __init__(self, rows=None):
+        self.rows = rows
+
+
+class Recorder:
+    """Thread-safe ring buffer of span records."""
+
+    def __init__(self, maxlen=MAX_RECORDS, log_path=None):
+        self._records = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.log_path = log_path
+
+    def start_run(self, label=None):
+        self._local.run = label or uuid.uuid4().hex[:12]
+        return self._local.run
+
+    @contextmanager
+    def span(self, stage, rows=None):
+        current = Span(rows)
+        t0 = time.perf_counter()
+        try:
+            yield current
+        finally:
+            self.record(stage, time.perf_counter() - t0, current.rows)
+
+    def record(self, stage, seconds, rows=None):
+        record = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "run": getattr(self._local, "run", None),
+            "stage": stage,
+            "seconds": round(seconds, 6),
+            "rows": None if rows is None else int(rows),
+        }
+        with self._lock:
+            self._records.append(record)
+            if self.log_path:
+                with open(self.log_path, "a") as fh:
+                    fh.write(json.dumps(record) + "\n")
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def summary(self):
+        """Per stage: calls, latest seconds and rows, median and p95 seconds."""
+        df = pd.DataFrame(self.records(), columns=["ts", "run", "stage", "seconds", "rows"])
+        if df.empty:
+            return pd.DataFrame(columns=["stage", "calls", "latest_s", "latest_rows", "median_s", "p95_s"])
+        grouped = df.groupby("stage", sort=False)
+        summary = pd.DataFrame({
+            "calls": grouped.size(),
+            "latest_s": grouped["seconds"].last(),
+            "latest_rows": grouped["rows"].last(),
+            "median_s": grouped["seconds"].median(),
+            "p95_s": grouped["seconds"].quantile(0.95),
+        })
+        return summary.sort_values("p95_s", ascending=False).reset_index()
+
+    def to_jsonl(self):
+        return "".join(json.dumps(record) + "\n" for record in self.records())
+
+
+RECORDER = Recorder(log_path=os.environ.get("ATTENDANCE_TIMING_LOG"))
+span = RECORDER.span
+start_run = RECORDER.start_run
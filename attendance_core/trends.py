@@ -0,0 +1,88 @@
+"""Attendance trends and the course x hour heatmap.
+
+Both views read small buckets instead of the raw log on every rerun. The app
+builds and caches them per storage period (a month or an archived term, see
+``attendance_periods``), so a write only rebuilds the buckets of the periods
+it touched, and concatenates the periods in range:
+
+* ``day_buckets`` sums the daily rollup into attended/total hours per
+  (date, department); weekly and monthly trends only regroup those rows by
+  period.
+* ``hour_buckets`` counts hour-level records per (department, course, hour)
+  for the heatmap.
+
+Departments are the students' ``major_course``, as in the reports, and camp
+days are excluded the same way.
+"""
+import numpy as np
+import pandas as pd
+
+from attendance_core.camp import camp_exclusion_mask
+from attendance_core.marking import EXTRA_HOUR, is_extra_hour
+
+FREQUENCIES = {"Weekly": "W", "Monthly": "M"}
+DAY_BUCKET_COLUMNS = ["date", "department", "attended", "total"]
+HOUR_BUCKET_COLUMNS = ["department", "course_id", "hour", "attended", "total"]
+
+
+def _departments(student_ids, students):
+    majors = students.drop_duplicates("student_id")
+    majors = pd.Series(majors["major_course"].astype(str).to_numpy(), index=majors["student_id"].astype(str))
+    # Map each distinct student once, then spread to the rows by code.
+    codes, uniques = pd.factorize(student_ids)
+    per_student = pd.Index(uniques).astype(str).map(majors).fillna("").to_numpy(dtype=object)
+    return np.r_[per_student, [""]][codes]
+
+
+def _bucket(frame, by, count, students, camp_days):
+    absent = (frame["status"].astype(str) == "A").to_numpy()
+    buckets = frame[by].assign(department=_departments(frame["student_id"], students),
+                               attended=count * ~absent, total=count)
+    if camp_days is not None:
+        buckets = buckets[~camp_exclusion_mask(frame, camp_days)]
+    return buckets.groupby(["department", *by], observed=True)[["attended", "total"]].sum().reset_index()
+
+
+def day_buckets(rollup, students, camp_days=None):
+    """Attended/total hours per (date, department) from daily rollup rows."""
+    if rollup.empty:
+        return pd.DataFrame(columns=DAY_BUCKET_COLUMNS)
+    return _bucket(rollup, ["date"], rollup["count"].to_numpy(), students, camp_days)[DAY_BUCKET_COLUMNS]
+
+
+def hour_buckets(attendance, students, camp_days=None):
+    """Attended/total hours per (department, course_id, hour) from hour-level records."""
+    if attendance.empty:
+        return pd.DataFrame(columns=HOUR_BUCKET_COLUMNS)
+    return _bucket(attendance, ["course_id", "hour"], 1, students, camp_days)[HOUR_BUCKET_COLUMNS]
+
+
+def _percent(frame):
+    frame["percent"] = (frame["attended"] / frame["total"].where(frame["total"] > 0) * 100).round(1)
+    return frame
+
+
+def _department_rows(buckets, department):
+    return buckets[buckets["department"] == str(department)] if department else buckets
+
+
+def trend(buckets, freq="W", department=None, from_date=None, to_date=None):
+    """Attended/total/percent per week (``"W"``, starting Monday) or month (``"M"``), indexed by period start."""
+    rows = _department_rows(buckets, department)
+    if from_date is not None:
+        rows = rows[rows["date"] >= pd.to_datetime(from_date)]
+    if to_date is not None:
+        rows = rows[rows["date"] <= pd.to_datetime(to_date)]
+    if rows.empty:
+        return pd.DataFrame(columns=["attended", "total", "percent"], index=pd.DatetimeIndex([], name="period"))
+    period = pd.to_datetime(rows["date"]).dt.to_period(freq).dt.start_time.rename("period")
+    return _percent(rows.groupby(period)[["attended", "total"]].sum())
+
+
+def heatmap(buckets, department=None):
+    """Long-form (course_id, hour, attended, total, percent) rows for the course x hour heatmap."""
+    rows = _department_rows(buckets, department)
+    # Every extra class of a course shares one "Extra" column.
+    rows = rows.assign(hour=rows["hour"].where(~is_extra_hour(rows["hour"]), EXTRA_HOUR))
+    cells = rows.groupby(["course_id", "hour"], observed=True)[["attended", "total"]].sum().reset_index()
+    return _percent(cells[cells["total"] > 0].reset_index(drop=True))
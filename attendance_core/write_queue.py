@@ -0,0 +1,176 @@
+"""Background attendance writer.
+
+``WriteQueue.submit()`` records a submission in a write-ahead journal
+(fsynced), queues it and returns a ``Future`` right away. A single writer
+thread drains the queue, merges the submissions that arrive within a short
+window into one ``storage.append_attendance`` call, marks them done in the
+journal and resolves their futures. If the process dies in between, the
+submissions still pending in the journal are written again on the next
+start; appends are upserts by key, so replaying one that had already been
+written is harmless.
+
+When the queue is idle and the storage's CSV delta log has grown past
+``ATTENDANCE_COMPACT_BYTES`` (edits and deletes are appended there too), the
+writer thread also compacts it into the monthly partitions. A failed
+compaction is logged and retried after a growing delay; it never stops the
+writer.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+import pandas as pd
+
+from attendance_core.storage import ATTENDANCE_COLUMNS, _ends_with_newline, _format_attendance, file_lock
+
+BATCH_WINDOW = 0.05
+COMPACT_BYTES = 16 * 2**20
+# Seconds before retrying a failed compaction, doubled after each failure.
+COMPACT_RETRY = 60.0
+COMPACT_RETRY_MAX = 3600.0
+
+logger = logging.getLogger(__name__)
+
+
+def _journal_entries(path):
+    """``(pending, done)``: submissions without a done marker, and all done ids."""
+    submitted, done = {}, set()
+    if not os.path.exists(path):
+        return submitted, done
+    with open(path) as fh:
+        for line in fh:
+            try:
+                entry = json.loads(line)
+            except ValueError:  # torn last line from a crash
+                continue
+            if "rows" in entry:
+                submitted[entry["id"]] = entry["rows"]
+            done.update(entry.get("done", []))
+    return {key: rows for key, rows in submitted.items() if key not in done}, done
+
+
+class WriteQueue:
+    """Single writer thread for ``storage`` with a journal at ``journal_path``."""
+
+    def __init__(self, storage, journal_path, window=BATCH_WINDOW, compact_bytes=None):
+        self.storage = storage
+        self.journal_path = journal_path
+        self.window = window
+        if compact_bytes is None:
+            compact_bytes = int(os.environ.get("ATTENDANCE_COMPACT_BYTES", COMPACT_BYTES))
+        self.compact_bytes = compact_bytes if hasattr(storage, "log_size") else 0
+        self._compact_retry = COMPACT_RETRY
+        self._compact_after = 0.0
+        self._queue = queue.Queue()
+        self.replayed = self.replay()
+        self._thread = threading.Thread(target=self._run, name="attendance-writer", daemon=True)
+        self._thread.start()
+
+    def _journal(self, entry):
+        with file_lock(self.journal_path):
+            # After a crash the last line may be torn; start a new line so
+            # this entry is not glued onto it and lost with it.
+            needs_newline = os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0 \
+                and not _ends_with_newline(self.journal_path)
+            with open(self.journal_path, "a") as fh:
+                if needs_newline:
+                    fh.write("\n")
+                fh.write(json.dumps(entry) + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+
+    def _truncate_if_settled(self):
+        with file_lock(self.journal_path):
+            pending, _ = _journal_entries(self.journal_path)
+            if not pending and os.path.exists(self.journal_path):
+                open(self.journal_path, "w").close()
+
+    def replay(self):
+        """Write every submission left pending in the journal; returns how many were replayed."""
+        with file_lock(self.journal_path):
+            pending, _ = _journal_entries(self.journal_path)
+        if pending:
+            self._write([(entry_id, pd.DataFrame(rows, columns=ATTENDANCE_COLUMNS), Future())
+                         for entry_id, rows in pending.items()])
+        self._truncate_if_settled()
+        return len(pending)
+
+    def submit(self, rows):
+        """Journal and queue ``rows``; the returned future resolves to the rows once written."""
+        rows = _format_attendance(rows)
+        entry_id = uuid.uuid4().hex
+        records = rows.astype(object).where(rows.notna(), None).to_dict("records")
+        self._journal({"id": entry_id, "rows": records})
+        future = Future()
+        self._queue.put((entry_id, rows, future))
+        return future
+
+    def request_compaction(self):
+        """Have the writer check the log size (e.g. after direct edits or deletes)."""
+        self._queue.put(None)
+
+    def _maybe_compact(self):
+        if not self.compact_bytes or time.monotonic() < self._compact_after:
+            return
+        if self.storage.log_size() > self.compact_bytes:
+            try:
+                self.storage.compact()
+            except ImportError:  # no pyarrow: keep appending to the CSV log
+                self.compact_bytes = 0
+            except Exception:
+                logger.exception("Compaction failed; retrying in %.0f s", self._compact_retry)
+                self._compact_after = time.monotonic() + self._compact_retry
+                self._compact_retry = min(self._compact_retry * 2, COMPACT_RETRY_MAX)
+            else:
+                self._compact_retry = COMPACT_RETRY
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            self.storage.append_attendance(pd.concat([rows for _, rows, _ in batch], ignore_index=True))
+            results = [(future, rows, None) for _, rows, future in batch]
+        except Exception:
+            # Retry one by one so a bad submission does not fail the others.
+            results = []
+            for _, rows, future in batch:
+                try:
+                    results.append((future, self.storage.append_attendance(rows), None))
+                except Exception as exc:
+                    results.append((future, None, exc))
+        self._journal({"done": [entry_id for entry_id, _, _ in batch]})
+        for future, rows, exc in results:
+            if exc is None:
+                future.set_result(rows)
+            else:
+                future.set_exception(exc)
+
+    def _run(self):
+        while True:
+            batch = [item for item in self._next_batch() if item is not None]
+            try:
+                if batch:
+                    self._write(batch)
+            except Exception as exc:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            if self._queue.empty():
+                try:
+                    self._truncate_if_settled()
+                    self._maybe_compact()
+                except Exception:  # housekeeping only; keep serving submissions
+                    logger.exception("Write queue housekeeping failed")
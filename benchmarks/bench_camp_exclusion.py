@@ -0,0 +1,73 @@
+"""Compare the vectorized camp-day exclusion with the original set + apply version.
+
+    python benchmarks/bench_camp_exclusion.py --rows 200000 --campers 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attendance_core.camp import CampIndex, camp_exclusion_mask  # noqa: E402
+
+
+def legacy_mask(attendance, camp_days):
+    camp_set = set()
+    for _, row in camp_days.iterrows():
+        for d in pd.date_range(row["start_date"], row["end_date"]):
+            camp_set.add((row["student_id"], d.strftime("%Y-%m-%d")))
+    date_str = attendance["date"].dt.strftime("%Y-%m-%d")
+    frame = attendance.assign(date_str=date_str)
+    return frame.apply(lambda x: (x["student_id"], x["date_str"]) in camp_set, axis=1).to_numpy(dtype=bool)
+
+
+def make_data(rows, students, campers, seed=0):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2025-06-01")
+    student_ids = np.array([f"S{i:05d}" for i in range(students)])
+    attendance = pd.DataFrame({
+        "student_id": rng.choice(student_ids, rows),
+        "date": pd.to_datetime(start + rng.integers(0, 180, rows).astype("timedelta64[D]")),
+    })
+    camp_start = start + rng.integers(0, 170, campers).astype("timedelta64[D]")
+    camp_days = pd.DataFrame({
+        "student_id": rng.choice(student_ids, campers),
+        "start_date": pd.to_datetime(camp_start),
+        "end_date": pd.to_datetime(camp_start + rng.integers(0, 10, campers).astype("timedelta64[D]")),
+        "activity": "NSS",
+    })
+    return attendance, camp_days
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--students", type=int, default=5_000)
+    parser.add_argument("--campers", type=int, default=1_000)
+    parser.add_argument("--skip-legacy", action="store_true", help="only time the vectorized version")
+    args = parser.parse_args()
+
+    attendance, camp_days = make_data(args.rows, args.students, args.campers)
+    new, new_s = timed(camp_exclusion_mask, attendance, camp_days)
+    print(f"vectorized: {new_s * 1000:9.1f} ms  ({int(new.sum())} rows excluded)")
+    index, build_s = timed(CampIndex, camp_days)
+    _, indexed_s = timed(index.mask, attendance)
+    print(f"index:      {build_s * 1000:9.1f} ms build, {indexed_s * 1000:.1f} ms mask with the prebuilt index")
+    if not args.skip_legacy:
+        old, old_s = timed(legacy_mask, attendance, camp_days)
+        print(f"legacy:     {old_s * 1000:9.1f} ms  ({int(old.sum())} rows excluded)")
+        print(f"speedup:    {old_s / new_s:9.1f}x  masks equal: {bool((old == new).all())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Memory footprint of the attendance frame before and after schema coercion.
+
+    python benchmarks/bench_memory.py --rows 1000000 --students 5000
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attendance_core.schema import STATUSES, coerce_frame, shared_dtypes  # noqa: E402
+
+
+def make_data(rows, students, courses, seed=0):
+    rng = np.random.default_rng(seed)
+    student_ids = np.array([f"S{i:05d}" for i in range(students)], dtype=object)
+    course_ids = np.array([f"C{i:03d}" for i in range(courses)], dtype=object)
+    students_df = pd.DataFrame({
+        "student_id": student_ids,
+        "name": [f"Student {i}" for i in range(students)],
+        "major_course": rng.choice(course_ids, students),
+    })
+    courses_df = pd.DataFrame({"course_id": course_ids, "name": course_ids, "teacher_id": [f"T{i % 50:03d}" for i in range(courses)]})
+    teachers_df = pd.DataFrame({"teacher_id": [f"T{i:03d}" for i in range(50)]})
+    attendance = pd.DataFrame({
+        "date": pd.to_datetime(np.datetime64("2025-06-01") + rng.integers(0, 180, rows).astype("timedelta64[D]")),
+        "hour": rng.integers(1, 7, rows),
+        "course_id": rng.choice(course_ids, rows),
+        "student_id": rng.choice(student_ids, rows),
+        "status": rng.choice(np.array(STATUSES, dtype=object), rows, p=[0.8, 0.1, 0.04, 0.04, 0.02]),
+        "marked_by": rng.choice(teachers_df["teacher_id"].to_numpy(dtype=object), rows),
+        "extra_time": np.full(rows, "", dtype=object),
+        "duration": np.full(rows, "", dtype=object),
+    })
+    for col in ["course_id", "student_id", "status", "marked_by", "extra_time", "duration"]:
+        attendance[col] = attendance[col].astype(object)
+    return attendance, students_df, courses_df, teachers_df
+
+
+def mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--students", type=int, default=5_000)
+    parser.add_argument("--courses", type=int, default=200)
+    args = parser.parse_args()
+
+    attendance, students, courses, teachers = make_data(args.rows, args.students, args.courses)
+    dtypes = shared_dtypes(students, courses, teachers)
+    compact = coerce_frame(attendance, dtypes)
+    compact_students = coerce_frame(students, dtypes)
+
+    print(f"object columns: {mb(attendance):9.1f} MB")
+    print(f"compact:        {mb(compact):9.1f} MB  ({mb(attendance) / mb(compact):.1f}x smaller)")
+
+    # Operations the reports perform must not fall back to object columns.
+    merged = compact[compact["status"] != "A"].merge(compact_students, on="student_id", how="left")
+    appended = pd.concat([compact, compact.head(10)], ignore_index=True)
+    for label, frame in [("filter+merge", merged), ("concat", appended)]:
+        kept = {col: str(frame[col].dtype) for col in ["student_id", "course_id", "status"]}
+        print(f"{label:14} dtypes: {kept}")
+
+
+if __name__ == "__main__":
+    main()
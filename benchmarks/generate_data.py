@@ -0,0 +1,156 @@
+"""Generate a synthetic data set in the app's CSV layout.
+
+    python benchmarks/generate_data.py --out /tmp/attendance-bench --students 5000 --days 180 --hours 6
+
+Writes students.csv, teachers.csv, courses.csv, enrollment.csv,
+student_course_selection.csv, camp_days.csv and attendance.csv. Every student
+has a major, two minors, an MDC and a VAC course. Each working day (Mon-Sat),
+each hour is taught in one of the student's courses and marked with a
+per-student absence rate.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+SLOTS = ["major_course", "minor1", "minor2", "mdc", "vac"]
+SUBJECTS = ["PHY", "CHE", "MAT", "BOT", "ZOO", "ENG", "HIS", "ECO", "COM", "CSC", "MAL", "HIN", "POL", "PSY", "STA"]
+
+
+def make_reference(students, departments, seed=0):
+    rng = np.random.default_rng(seed)
+    depts = SUBJECTS[:departments]
+    courses = pd.DataFrame(
+        [(f"{prefix}{d}", f"{label} {d}") for d in depts for prefix, label in [("MJ", "Major"), ("MN", "Minor")]]
+        + [(f"MDC{i:02d}", f"MDC {i}") for i in range(max(departments // 2, 1))]
+        + [(f"VAC{i:02d}", f"VAC {i}") for i in range(max(departments // 2, 1))],
+        columns=["course_id", "name"],
+    )
+    teachers = pd.DataFrame({
+        "teacher_id": [f"T{i:04d}" for i in range(len(courses))],
+        "name": [f"Teacher {i}" for i in range(len(courses))],
+        "email": [f"teacher{i}@example.edu" for i in range(len(courses))],
+        "password": "abc1234",
+        "role": "teacher",
+        "department": [c if c.startswith("MJ") else "" for c in courses["course_id"]],
+    })
+    teachers.loc[0, "role"] = "admin"
+    courses["teacher_id"] = teachers["teacher_id"]
+
+    major = rng.choice(depts, students)
+    minor1 = rng.choice(depts, students)
+    minor2 = rng.choice(depts, students)
+    mdc = courses.loc[courses["course_id"].str.startswith("MDC"), "course_id"].to_numpy()
+    vac = courses.loc[courses["course_id"].str.startswith("VAC"), "course_id"].to_numpy()
+    selection = pd.DataFrame({
+        "student_id": [f"S{i:05d}" for i in range(students)],
+        "major_course": np.char.add("MJ", major.astype(str)),
+        "minor1": np.char.add("MN", minor1.astype(str)),
+        "minor2": np.char.add("MN", minor2.astype(str)),
+        "mdc": rng.choice(mdc, students),
+        "vac": rng.choice(vac, students),
+    })
+    students_df = pd.DataFrame({
+        "student_id": selection["student_id"],
+        "name": [f"Student {i}" for i in range(students)],
+        "major_course": selection["major_course"],
+    })
+    enrollment = selection.melt(id_vars=["student_id"], value_vars=SLOTS, value_name="course_id")[["student_id", "course_id"]]
+    enrollment = enrollment.drop_duplicates().sort_values(["student_id", "course_id"]).reset_index(drop=True)
+    for dept in depts:
+        teachers.loc[len(teachers)] = [f"D{dept}", f"Head {dept}", f"head.{dept.lower()}@example.edu", "abc1234",
+                                       "dept_admin", f"MJ{dept}"]
+    return students_df, teachers, courses, enrollment, selection
+
+
+def working_days(start, days):
+    dates = pd.bdate_range(start, periods=days, freq="C", weekmask="Mon Tue Wed Thu Fri Sat")
+    return dates.strftime("%Y-%m-%d").to_numpy()
+
+
+def write_attendance(path, selection, teachers_by_course, dates, hours, seed=0, chunk_days=10):
+    """Write attendance.csv a few days at a time; returns the number of rows."""
+    rng = np.random.default_rng(seed + 1)
+    student_ids = selection["student_id"].to_numpy()
+    timetable = selection[SLOTS].to_numpy()
+    absence = rng.beta(1.5, 12, len(student_ids))
+    statuses = np.array(["A", "P", "NSS", "NCC", "Club"])
+    rows = 0
+    header = True
+    with open(path, "w", newline="") as fh:
+        for start in range(0, len(dates), chunk_days):
+            chunk = dates[start:start + chunk_days]
+            n_days, n_students = len(chunk), len(student_ids)
+            day_idx = np.repeat(np.arange(n_days), n_students * hours)
+            stu_idx = np.tile(np.repeat(np.arange(n_students), hours), n_days)
+            hour = np.tile(np.arange(1, hours + 1), n_days * n_students)
+            slot = (hour - 1 + start + day_idx) % len(SLOTS)
+            course = timetable[stu_idx, slot]
+            roll = rng.random(len(day_idx))
+            status = np.where(roll < absence[stu_idx], 0, np.where(roll > 0.995, rng.integers(2, 5, len(roll)), 1))
+            df = pd.DataFrame({
+                "date": chunk[day_idx],
+                "hour": hour,
+                "course_id": course,
+                "student_id": student_ids[stu_idx],
+                "status": statuses[status],
+                "marked_by": teachers_by_course.reindex(course).to_numpy(),
+                "extra_time": "",
+                "duration": "",
+            })
+            df.to_csv(fh, header=header, index=False)
+            header = False
+            rows += len(df)
+    return rows
+
+
+def make_camp_days(student_ids, dates, fraction, seed=0):
+    rng = np.random.default_rng(seed + 2)
+    campers = rng.choice(student_ids, int(len(student_ids) * fraction), replace=False)
+    starts = pd.to_datetime(rng.choice(dates, len(campers)))
+    lengths = pd.to_timedelta(rng.integers(0, 7, len(campers)), unit="D")
+    return pd.DataFrame({
+        "student_id": campers,
+        "start_date": starts.strftime("%Y-%m-%d"),
+        "end_date": (starts + lengths).strftime("%Y-%m-%d"),
+        "activity": rng.choice(["NSS", "NCC"], len(campers)),
+    })
+
+
+def generate(out, students=500, days=30, hours=6, departments=10, camp_fraction=0.2, start="2025-06-02", seed=0):
+    os.makedirs(out, exist_ok=True)
+    students_df, teachers, courses, enrollment, selection = make_reference(students, departments, seed)
+    students_df.to_csv(os.path.join(out, "students.csv"), index=False)
+    teachers.to_csv(os.path.join(out, "teachers.csv"), index=False)
+    courses.to_csv(os.path.join(out, "courses.csv"), index=False)
+    enrollment.to_csv(os.path.join(out, "enrollment.csv"), index=False)
+    selection.to_csv(os.path.join(out, "student_course_selection.csv"), index=False)
+    dates = working_days(start, days)
+    camp_days = make_camp_days(students_df["student_id"].to_numpy(), dates, camp_fraction, seed)
+    camp_days.to_csv(os.path.join(out, "camp_days.csv"), index=False)
+    teachers_by_course = courses.set_index("course_id")["teacher_id"]
+    rows = write_attendance(os.path.join(out, "attendance.csv"), selection, teachers_by_course, dates, hours, seed)
+    return {"students": len(students_df), "courses": len(courses), "enrollment": len(enrollment),
+            "camp_days": len(camp_days), "attendance": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", required=True, help="directory to write the CSV files to")
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--days", type=int, default=30, help="number of working days (Mon-Sat)")
+    parser.add_argument("--hours", type=int, default=6)
+    parser.add_argument("--departments", type=int, default=10, choices=range(1, len(SUBJECTS) + 1), metavar="N")
+    parser.add_argument("--camp-fraction", type=float, default=0.2, help="share of students with a camp interval")
+    parser.add_argument("--start", default="2025-06-02")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    counts = generate(args.out, args.students, args.days, args.hours, args.departments, args.camp_fraction,
+                      args.start, args.seed)
+    for name, count in counts.items():
+        print(f"{name}: {count} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Multi-process load test: many teachers submitting attendance at the same moment.
+
+    python benchmarks/generate_data.py --out /tmp/bench-data --students 2000 --days 30
+    python benchmarks/load_test.py --data /tmp/bench-data --backend sqlite --workers 8 --teachers 200
+
+Each worker process plays one app replica: its own storage object and write
+queue (sharing the journal in the data directory, as the app's workers do) and
+``teachers / workers`` threads. Every simulated teacher loads a roster and
+submits one class hour, all starting together. Afterwards the store is
+checked: each submitted record is present once with its status, the daily
+rollup agrees, other replicas see every taken hour and the journal has nothing
+pending. Exits with status 1 on any error or mismatch.
+
+The data directory is copied to a scratch directory first.
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attendance_core.storage import KEY_COLUMNS, get_storage  # noqa: E402
+from attendance_core.write_queue import WriteQueue, _journal_entries  # noqa: E402
+
+
+def plan(courses, teachers):
+    """(teacher, course_id, hour) per simulated teacher; courses repeat with a new hour once all are used."""
+    return [(f"T{i:04d}", courses[i % len(courses)], 1 + i // len(courses)) for i in range(teachers)]
+
+
+def submit_class(storage, writer, teacher_id, course_id, hour, day, seed):
+    roster = storage.load_roster(course_id)
+    rng = np.random.default_rng(seed)
+    rows = pd.DataFrame({
+        "date": day, "hour": hour, "course_id": course_id, "student_id": roster["student_id"],
+        "status": rng.choice(["P", "A"], len(roster), p=[0.85, 0.15]),
+        "marked_by": teacher_id, "extra_time": "", "duration": "",
+    })
+    t0 = time.perf_counter()
+    writer.submit(rows).result(timeout=300)
+    return time.perf_counter() - t0, rows
+
+
+def replica(backend, data_dir, classes, day, start_at):
+    """One app process: returns ``(latencies, submitted rows, errors, time the last submit finished)``."""
+    storage = get_storage(backend, data_dir)
+    writer = WriteQueue(storage, os.path.join(data_dir, "attendance.journal"))
+    latencies, submitted, errors = [], [], []
+    lock = threading.Lock()
+
+    def teacher(teacher_id, course_id, hour):
+        time.sleep(max(start_at - time.time(), 0))
+        try:
+            latency, rows = submit_class(storage, writer, teacher_id, course_id, hour, day, seed=int(teacher_id[1:]))
+        except Exception as exc:
+            with lock:
+                errors.append(f"{teacher_id} {course_id} hour {hour}: {exc!r}")
+            return
+        with lock:
+            latencies.append(latency)
+            submitted.append(rows)
+
+    threads = [threading.Thread(target=teacher, args=c) for c in classes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    rows = pd.concat(submitted, ignore_index=True) if submitted else pd.DataFrame()
+    return latencies, rows, errors, time.time()
+
+
+def check(storage, data_dir, expected, day):
+    """Problems found in the store after the run (empty if consistent)."""
+    problems = []
+    stored = storage.load_attendance(from_date=day, to_date=day)
+    key = KEY_COLUMNS[1:]
+    stored = stored.assign(course_id=stored["course_id"].astype(str), student_id=stored["student_id"].astype(str),
+                           status=stored["status"].astype(str), hour=stored["hour"].astype(int))
+    merged = expected.merge(stored[key + ["status"]], on=key, how="outer", suffixes=("", "_stored"), indicator=True)
+    missing, extra = (merged["_merge"] == "left_only").sum(), (merged["_merge"] == "right_only").sum()
+    wrong = ((merged["_merge"] == "both") & (merged["status"] != merged["status_stored"])).sum()
+    if missing or extra or wrong:
+        problems.append(f"attendance: {missing} missing, {extra} unexpected, {wrong} with the wrong status")
+    if stored.duplicated(key).any():
+        problems.append(f"attendance: {int(stored.duplicated(key).sum())} duplicate keys")
+    rollup = storage.load_rollup(from_date=day, to_date=day)
+    by_status = rollup.groupby(rollup["status"].astype(str))["count"].sum().to_dict()
+    if by_status != expected["status"].value_counts().to_dict():
+        problems.append(f"rollup: {by_status} != {expected['status'].value_counts().to_dict()}")
+    for (course_id, hour) in expected[["course_id", "hour"]].drop_duplicates().itertuples(index=False):
+        if hour not in storage.taken_hours(course_id, day):
+            problems.append(f"taken_hours: {course_id} hour {hour} not reported")
+    pending, _ = _journal_entries(os.path.join(data_dir, "attendance.journal"))
+    if pending:
+        problems.append(f"journal: {len(pending)} submissions still pending")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", required=True, help="data directory (e.g. from generate_data.py)")
+    parser.add_argument("--backend", default="sqlite", choices=["csv", "sqlite"])
+    parser.add_argument("--workers", type=int, default=8, help="app processes")
+    parser.add_argument("--teachers", type=int, default=200, help="concurrent teachers, spread over the workers")
+    parser.add_argument("--date", default="2030-01-06", help="day the classes are marked for")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="attendance-load-")
+    try:
+        data_dir = os.path.join(scratch, "data")
+        shutil.copytree(args.data, data_dir)
+        if args.backend == "sqlite":
+            from attendance_core.sqlite_storage import migrate_csv_to_sqlite
+
+            migrate_csv_to_sqlite(data_dir)
+        storage = get_storage(args.backend, data_dir)
+        courses = storage.load_table("courses")["course_id"].astype(str).tolist()
+        classes = plan(courses, args.teachers)
+        day = pd.Timestamp(args.date)
+
+        # Spawned (not forked) so every worker is a fresh interpreter, like a separate app process.
+        ctx = multiprocessing.get_context("spawn")
+        start_at = time.time() + 5  # leave the workers time to start up
+        with ctx.Pool(args.workers) as pool:
+            jobs = [pool.apply_async(replica, (args.backend, data_dir, classes[i::args.workers], day, start_at))
+                    for i in range(args.workers)]
+            results = [job.get() for job in jobs]
+        wall = max(result[3] for result in results) - start_at
+
+        latencies = [latency for result in results for latency in result[0]]
+        expected = pd.concat([result[1] for result in results if len(result[1])], ignore_index=True)
+        errors = [error for result in results for error in result[2]]
+        expected = expected.assign(course_id=expected["course_id"].astype(str), student_id=expected["student_id"].astype(str))
+        expected = expected[KEY_COLUMNS[1:] + ["status"]]
+        problems = errors + check(get_storage(args.backend, data_dir), data_dir, expected, day)
+
+        latencies.sort()
+        print(f"backend={args.backend} workers={args.workers} teachers={args.teachers} "
+              f"submitted={len(latencies)} records={len(expected)}")
+        print(f"wall time {wall:.2f} s, {len(expected) / wall:.0f} records/s")
+        if latencies:
+            p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+            print(f"submit latency: median {statistics.median(latencies) * 1000:.0f} ms, "
+                  f"p95 {p95 * 1000:.0f} ms, max {latencies[-1] * 1000:.0f} ms")
+        for problem in problems:
+            print("FAIL", problem)
+        print("OK" if not problems else f"{len(problems)} problem(s)")
+        return 1 if problems else 0
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
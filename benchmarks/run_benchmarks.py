@@ -0,0 +1,158 @@
+"""Time the report and write paths headlessly (no Streamlit) against a data directory.
+
+    python benchmarks/generate_data.py --out /tmp/bench-data --students 5000 --days 180
+    python benchmarks/run_benchmarks.py --data /tmp/bench-data --backend csv sqlite --output bench_results.json
+
+The data directory is copied to a scratch directory first because the write
+benchmarks modify it. Results are written as JSON (one entry per case and
+backend, with min/median seconds and row counts) so runs can be compared.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attendance_core.camp import camp_exclusion_mask  # noqa: E402
+from attendance_core.export import detailed_log_chunks, export_file  # noqa: E402
+from attendance_core.reports import TABLES, consolidated_report, department_report  # noqa: E402
+from attendance_core.storage import CsvStorage  # noqa: E402
+from attendance_core.trends import day_buckets, heatmap, hour_buckets, trend  # noqa: E402
+
+
+def department_report_export(storage, tables, from_date, to_date, department=None):
+    _, rows = department_report(storage, from_date, to_date, department, tables)
+    with export_file(detailed_log_chunks(rows, tables["students"]), "CSV"):
+        pass
+    return rows
+
+
+def make_storage(backend, data_dir):
+    if backend == "csv":
+        return CsvStorage(data_dir)
+    from attendance_core.sqlite_storage import SqliteStorage, migrate_csv_to_sqlite
+
+    db_path = os.path.join(data_dir, "attendance.db")
+    if not os.path.exists(db_path):
+        migrate_csv_to_sqlite(data_dir, db_path)
+    return SqliteStorage(db_path)
+
+
+def run_case(name, fn, repeat):
+    times, rows = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+        rows = len(result) if hasattr(result, "__len__") else result
+    return {"case": name, "min_s": round(min(times), 6), "median_s": round(statistics.median(times), 6), "rows": rows}
+
+
+def cases(storage, tables, from_date, to_date, department):
+    attendance_range = storage.load_attendance(from_date, to_date)
+    course_id = tables["courses"]["course_id"].iloc[0]
+    roster = storage.load_roster(course_id)
+    day = pd.to_datetime(to_date) + pd.Timedelta(days=1)
+    new_rows = pd.DataFrame({"date": day, "hour": 1, "course_id": course_id, "student_id": roster["student_id"],
+                             "status": "P", "marked_by": "T0000", "extra_time": "", "duration": ""})
+    hour = iter(range(1, 10_000))
+    buckets = day_buckets(storage.load_rollup(from_date, to_date), tables["students"], tables["camp_days"])
+    cells = hour_buckets(attendance_range, tables["students"], tables["camp_days"])
+
+    def submit():
+        return storage.append_attendance(new_rows.assign(hour=next(hour)))
+
+    def delete():
+        keys = new_rows.assign(hour=next(hour))
+        storage.append_attendance(keys)
+        return storage.delete_attendance(keys)
+
+    return [
+        ("load_tables", lambda: sum(len(storage.load_table(name)) for name in TABLES)),
+        ("load_attendance_range", lambda: storage.load_attendance(from_date, to_date)),
+        ("load_rollup_range", lambda: storage.load_rollup(from_date, to_date)),
+        ("camp_exclusion", lambda: camp_exclusion_mask(attendance_range, tables["camp_days"])),
+        ("consolidated_report_all", lambda: consolidated_report(storage, from_date, to_date, None, tables)),
+        ("consolidated_report_dept", lambda: consolidated_report(storage, from_date, to_date, department, tables)),
+        ("department_report_dept", lambda: department_report_export(storage, tables, from_date, to_date, department)),
+        ("trend_buckets", lambda: day_buckets(storage.load_rollup(from_date, to_date), tables["students"], tables["camp_days"])),
+        ("hour_buckets", lambda: hour_buckets(attendance_range, tables["students"], tables["camp_days"])),
+        ("trend_weekly_dept", lambda: trend(buckets, "W", department)),
+        ("heatmap_dept", lambda: heatmap(cells, department)),
+        ("taken_hours", lambda: storage.taken_hours(course_id, from_date)),
+        ("roster", lambda: storage.load_roster(course_id)),
+        ("submit_class", submit),
+        ("delete_class_hour", delete),
+    ]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", required=True, help="data directory (e.g. from generate_data.py)")
+    parser.add_argument("--backend", nargs="+", default=["csv"], choices=["csv", "sqlite"])
+    parser.add_argument("--from-date", default=None, help="report range start (default: first attendance date)")
+    parser.add_argument("--to-date", default=None, help="report range end (default: last attendance date)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="attendance-bench-")
+    results = []
+    try:
+        for backend in args.backend:
+            data_dir = os.path.join(scratch, backend)
+            shutil.copytree(args.data, data_dir)
+            t0 = time.perf_counter()
+            storage = make_storage(backend, data_dir)
+            setup_s = time.perf_counter() - t0
+            tables = {name: storage.load_table(name) for name in TABLES}
+            dates = storage.load_attendance(columns=["date"])["date"]
+            from_date = pd.to_datetime(args.from_date) if args.from_date else dates.min()
+            to_date = pd.to_datetime(args.to_date) if args.to_date else dates.max()
+            department = tables["students"]["major_course"].mode().iloc[0]
+            results.append({"backend": backend, "case": "setup", "min_s": round(setup_s, 6),
+                            "median_s": round(setup_s, 6), "rows": None})
+            for name, fn in cases(storage, tables, from_date, to_date, department):
+                result = run_case(name, fn, args.repeat)
+                result["backend"] = backend
+                results.append(result)
+                print(f"{backend:7} {name:28} {result['median_s'] * 1000:10.1f} ms  rows={result['rows']}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "data": os.path.abspath(args.data),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as fh:
+        json.dump(report, fh, indent=2, default=str)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
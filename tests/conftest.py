@@ -0,0 +1,35 @@
+"""Fixtures and helpers shared by the storage tests: a CsvStorage on a temporary data directory."""
+import pandas as pd
+import pytest
+
+from attendance_core.storage import CsvStorage
+
+DAY = "2025-06-02"
+
+
+def marks(hours=(1,), students=("S1", "S2"), status="P", day=DAY, course_id="C1"):
+    return pd.DataFrame([
+        {"date": day, "hour": hour, "course_id": course_id, "student_id": student_id, "status": status,
+         "marked_by": "T1", "extra_time": "", "duration": ""}
+        for hour in hours for student_id in students
+    ])
+
+
+def live(storage, **filters):
+    """``{(date, hour, course_id, student_id): status}`` of the live records."""
+    rows = storage.load_attendance(**filters)
+    return {(f"{row.date:%Y-%m-%d}", int(row.hour), str(row.course_id), str(row.student_id)): str(row.status)
+            for row in rows.itertuples()}
+
+
+def rollup(storage, **filters):
+    """``{(student_id, date, status): count}`` from the daily rollup."""
+    rows = storage.load_rollup(**filters)
+    return {(str(row.student_id), f"{row.date:%Y-%m-%d}", str(row.status)): int(row.count)
+            for row in rows.itertuples()}
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.delenv("ATTENDANCE_TERM_MONTHS", raising=False)
+    return CsvStorage(str(tmp_path))
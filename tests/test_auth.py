@@ -0,0 +1,40 @@
+"""Password hashing, the credential store and login."""
+import pandas as pd
+import pytest
+
+from attendance_core.auth import authenticate, credential_store, hash_passwords, is_hashed, verify_password
+
+TEACHERS = pd.DataFrame({
+    "teacher_id": ["T1", "T2", "T3"],
+    "name": ["Asha", "Ravi", "Someone Else"],
+    "email": [" Asha@College.edu", "ravi@college.edu", "asha@college.edu"],
+    "password": ["secret", "hunter2", "other"],
+    "role": ["teacher", "dept_admin", "teacher"],
+    "department": ["PHY", "CHEM", "MATH"],
+})
+
+
+@pytest.fixture(autouse=True)
+def cheap_hashes(monkeypatch):
+    monkeypatch.setenv("ATTENDANCE_PASSWORD_ITERATIONS", "1000")
+
+
+def test_hashed_and_plaintext_passwords_verify():
+    hashed, count = hash_passwords(TEACHERS)
+    assert count == 3 and hashed["password"].map(is_hashed).all()
+    assert hash_passwords(hashed)[1] == 0
+    assert verify_password("secret", hashed["password"][0])
+    assert not verify_password("Secret", hashed["password"][0])
+    assert verify_password("secret", "secret ")  # legacy plaintext entry
+
+
+@pytest.mark.parametrize("hashed", [False, True])
+def test_login_by_normalized_email(hashed):
+    store = credential_store(hash_passwords(TEACHERS)[0] if hashed else TEACHERS)
+    user = authenticate(store, "ASHA@college.edu ", "secret")
+    # The first row of a repeated email wins.
+    assert user == {"teacher_id": "T1", "name": "Asha", "role": "teacher", "department": "PHY"}
+    assert "password" not in user
+    assert authenticate(store, "asha@college.edu", "other") is None
+    assert authenticate(store, "ravi@college.edu", "") is None
+    assert authenticate(store, "nobody@college.edu", "secret") is None
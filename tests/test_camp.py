@@ -0,0 +1,76 @@
+"""Camp-day normalization, merging and the interval index, checked against expanding every interval into days."""
+import numpy as np
+import pandas as pd
+
+from attendance_core.camp import CampIndex, camp_exclusion_mask, merge_camp_days, normalize_camp_days
+
+
+def random_camp_days(seed=0, rows=60):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2025-06-01") + pd.to_timedelta(rng.integers(0, 60, rows), unit="D")
+    return pd.DataFrame({
+        "student_id": rng.choice([f"S{i}" for i in range(8)], rows),
+        "start_date": start,
+        "end_date": start + pd.to_timedelta(rng.integers(0, 6, rows), unit="D"),
+        "activity": rng.choice(["NSS", "NCC"], rows),
+    })
+
+
+def legacy_mask(attendance, camp_days):
+    """The exclusion as the reports first computed it: a set of every (student, day) on camp."""
+    camp_set = set()
+    for _, row in camp_days.iterrows():
+        for d in pd.date_range(row["start_date"], row["end_date"]):
+            camp_set.add((row["student_id"], d.strftime("%Y-%m-%d")))
+    days = attendance["date"].dt.strftime("%Y-%m-%d")
+    return np.array([(student_id, day) in camp_set for student_id, day in zip(attendance["student_id"], days)])
+
+
+def camp_dates(camp_days):
+    return {day for row in camp_days.itertuples() for day in pd.date_range(row.start_date, row.end_date)}
+
+
+def test_index_mask_matches_the_expanded_days():
+    camp_days = random_camp_days()
+    rng = np.random.default_rng(1)
+    attendance = pd.DataFrame({
+        "student_id": rng.choice([f"S{i}" for i in range(10)], 3000),
+        "date": pd.Timestamp("2025-05-25") + pd.to_timedelta(rng.integers(0, 80, 3000), unit="D"),
+    })
+    expected = legacy_mask(attendance, camp_days)
+    assert expected.any()
+    np.testing.assert_array_equal(camp_exclusion_mask(attendance, camp_days), expected)
+    categorical = attendance.assign(student_id=attendance["student_id"].astype("category"))
+    np.testing.assert_array_equal(CampIndex(camp_days).mask(categorical), expected)
+
+
+def test_merging_keeps_the_same_days():
+    camp_days = random_camp_days()
+    merged = merge_camp_days(camp_days)
+    assert len(merged) < len(camp_days)
+    for (student_id, activity), rows in camp_days.groupby(["student_id", "activity"]):
+        kept = merged[(merged["student_id"] == student_id) & (merged["activity"] == activity)]
+        assert camp_dates(kept) == camp_dates(rows)
+        # Merged intervals neither overlap nor touch.
+        gaps = kept["start_date"].iloc[1:].to_numpy() - kept["end_date"].iloc[:-1].to_numpy()
+        assert (gaps > np.timedelta64(1, "D")).all()
+
+
+def test_legacy_rows_are_normalized():
+    legacy = pd.DataFrame({"student_id": ["S1", "S2", None], "start_date": ["2025-06-05", "2025-06-01", "2025-06-01"],
+                           "end_date": ["2025-06-03", "2025-06-02", "2025-06-02"], "camp_type": ["NSS", "NCC", "NSS"]})
+    camp = normalize_camp_days(legacy)
+    assert camp.values.tolist() == [["S1", pd.Timestamp("2025-06-03"), pd.Timestamp("2025-06-05"), "NSS"],
+                                    ["S2", pd.Timestamp("2025-06-01"), pd.Timestamp("2025-06-02"), "NCC"]]
+
+
+def test_point_lookups():
+    index = CampIndex(pd.DataFrame({"student_id": ["S1", "S1", "S2"],
+                                    "start_date": ["2025-06-01", "2025-06-10", "2025-06-03"],
+                                    "end_date": ["2025-06-03", "2025-06-11", "2025-06-03"],
+                                    "activity": ["NSS", "NCC", "NCC"]}))
+    assert index.is_exempt("S1", "2025-06-02") and not index.is_exempt("S1", "2025-06-04")
+    assert not index.is_exempt("S9", "2025-06-02")
+    assert index.activities_on(["S1", "S2", "S3"], "2025-06-03").tolist() == ["NSS", "NCC", ""]
+    assert index.exempt_days("S1", "2025-06-02", "2025-06-10").strftime("%d").tolist() == ["02", "03", "10"]
+    assert len(index.exempt_days("S2", "2025-06-04", "2025-06-30")) == 0
@@ -0,0 +1,54 @@
+"""Course selection uploads applied to enrollment as a diff."""
+import pandas as pd
+import pytest
+
+from attendance_core.enrollment import (apply_changes, change_summary, diff_enrollment, enrollment_from_selection,
+                                        unknown_courses)
+from attendance_core.sqlite_storage import SqliteStorage
+from attendance_core.storage import CsvStorage
+
+CURRENT = pd.DataFrame({"student_id": ["S1", "S1", "S2", "S2", "S3"],
+                        "course_id": ["PHY", "ENG", "CHEM", "ENG", "MATH"]})
+SELECTION = pd.DataFrame({"student_id": ["S1", "S2"], "major_course": ["PHY", "CHEM"], "minor1": ["HIN", "ENG"],
+                          "minor2": [None, None], "mdc": [None, None], "vac": [None, None]})
+
+
+def pairs(frame):
+    return sorted(map(tuple, frame[["student_id", "course_id"]].astype(str).values.tolist()))
+
+
+def test_selection_sheet_becomes_pairs():
+    assert pairs(enrollment_from_selection(SELECTION)) == [("S1", "HIN"), ("S1", "PHY"), ("S2", "CHEM"), ("S2", "ENG")]
+    courses = pd.DataFrame({"course_id": ["PHY", "CHEM", "ENG"]})
+    assert unknown_courses(enrollment_from_selection(SELECTION), courses)["course_id"].tolist() == ["HIN"]
+
+
+def test_diff_touches_only_students_in_the_sheet():
+    new = enrollment_from_selection(SELECTION)
+    added, removed = diff_enrollment(CURRENT, new)
+    assert pairs(added) == [("S1", "HIN")]
+    assert pairs(removed) == [("S1", "ENG")]
+    untouched = CURRENT[CURRENT["student_id"] == "S3"]
+    assert pairs(apply_changes(CURRENT, added, removed)) == pairs(pd.concat([new, untouched]))
+    assert change_summary(added, removed).values.tolist() == [["ENG", 0, 1], ["HIN", 1, 0]]
+
+
+def test_replace_removes_everyone_else():
+    added, removed = diff_enrollment(CURRENT, enrollment_from_selection(SELECTION), replace=True)
+    assert pairs(removed) == [("S1", "ENG"), ("S3", "MATH")]
+    assert pairs(apply_changes(CURRENT, added, removed)) == pairs(enrollment_from_selection(SELECTION))
+    assert diff_enrollment(CURRENT, CURRENT)[0].empty and change_summary(*diff_enrollment(CURRENT, CURRENT)).empty
+
+
+@pytest.mark.parametrize("backend", ["csv", "sqlite"])
+def test_storage_applies_the_diff(tmp_path, backend):
+    storage = CsvStorage(str(tmp_path)) if backend == "csv" else SqliteStorage(str(tmp_path / "attendance.db"))
+    storage.save_table("enrollment", CURRENT)
+    before = storage.table_version("enrollment")
+    added, removed = diff_enrollment(CURRENT, enrollment_from_selection(SELECTION))
+    storage.update_enrollment(added, removed)
+    assert pairs(storage.load_table("enrollment")) == pairs(apply_changes(CURRENT, added, removed))
+    assert storage.table_version("enrollment") != before
+    # The sheet of a full replace is kept next to the other tables.
+    storage.save_table("student_course_selection", SELECTION)
+    assert storage.load_table("student_course_selection")["student_id"].tolist() == ["S1", "S2"]
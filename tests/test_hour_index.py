@@ -0,0 +1,60 @@
+"""Taken-hour lookups for the console and upserts by (date, hour, course_id, student_id)."""
+import os
+
+import pandas as pd
+import pytest
+from conftest import DAY, live, marks, rollup
+
+from attendance_core.marking import EXTRA_HOUR, available_hours, extra_hour
+from attendance_core.sqlite_storage import SqliteStorage
+from attendance_core.storage import CsvStorage
+
+
+def test_available_and_extra_hours():
+    assert available_hours([2, EXTRA_HOUR, 5]) == [1, 3, 4, 6]
+    assert extra_hour([1, 2]) == EXTRA_HOUR
+    assert extra_hour([EXTRA_HOUR, 7, 1]) == 8
+
+
+@pytest.mark.parametrize("backend", ["csv", "sqlite"])
+def test_a_second_submission_replaces_the_first(tmp_path, backend):
+    storage = CsvStorage(str(tmp_path)) if backend == "csv" else SqliteStorage(str(tmp_path / "attendance.db"))
+    storage.append_attendance(marks())
+    storage.append_attendance(marks(students=("S1",), status="A"))
+    assert live(storage) == {(DAY, 1, "C1", "S1"): "A", (DAY, 1, "C1", "S2"): "P"}
+    assert rollup(storage) == {("S1", DAY, "A"): 1, ("S2", DAY, "P"): 1}
+    assert list(storage.taken_hours("C1", DAY)) == [1]
+
+
+def test_extra_classes_on_one_day_get_their_own_hours(storage):
+    for status in ("P", "A"):
+        storage.append_attendance(marks(hours=(extra_hour(storage.taken_hours("C1", DAY)),), status=status))
+    assert storage.taken_hours("C1", DAY) == [EXTRA_HOUR, 7]
+    assert rollup(storage) == {(student, DAY, status): 1 for student in ("S1", "S2") for status in ("P", "A")}
+
+
+def test_legacy_extra_classes_are_numbered_before_upserts(storage):
+    legacy = pd.concat([marks(hours=(EXTRA_HOUR,)).assign(extra_time=time) for time in ("4 PM", "6 PM")])
+    legacy.to_csv(os.path.join(storage.data_dir, "attendance.csv"), index=False)
+    assert rollup(storage) == {("S1", DAY, "P"): 2, ("S2", DAY, "P"): 2}
+    assert storage.taken_hours("C1", DAY) == [EXTRA_HOUR, 7]
+    assert live(storage)[(DAY, 7, "C1", "S1")] == "P"
+
+
+def test_hour_index_reads_only_appended_rows(storage):
+    other = CsvStorage(storage.data_dir)  # another process's view of the same files
+    loads = []
+    load_live = other._hours._load_live
+    other._hours._load_live = lambda columns: loads.append(1) or load_live(columns)
+
+    assert other.taken_hours("C1", DAY) == []
+    storage.append_attendance(marks(hours=(1, 2)))
+    assert other.taken_hours("C1", DAY) == [1, 2]
+    storage.delete_attendance(marks(hours=(2,)))
+    assert other.taken_hours("C1", DAY) == [1]
+    assert len(loads) == 1
+
+    pytest.importorskip("pyarrow")
+    storage.compact()  # a rewritten log makes the next refresh rebuild
+    assert other.taken_hours("C1", DAY) == [1]
+    assert len(loads) == 2
@@ -0,0 +1,63 @@
+"""Month and term partitions: compaction, archiving past terms, and the term calendar."""
+import os
+
+import pandas as pd
+import pytest
+from conftest import DAY, live, marks, rollup
+
+from attendance_core.partitions import list_partitions, term_end, term_start
+
+
+@pytest.mark.parametrize("day, start, end", [
+    ("2025-06-02", "2025-06-01", "2025-11-30"),
+    ("2025-11-30", "2025-06-01", "2025-11-30"),
+    ("2026-02-10", "2025-12-01", "2026-05-31"),
+])
+def test_terms_follow_the_configured_start_months(monkeypatch, day, start, end):
+    monkeypatch.delenv("ATTENDANCE_TERM_MONTHS", raising=False)
+    assert term_start(day) == pd.Timestamp(start)
+    assert term_end(term_start(day)) == pd.Timestamp(end)
+
+
+def test_term_months_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("ATTENDANCE_TERM_MONTHS", "1,7")
+    assert term_start("2025-06-30") == pd.Timestamp("2025-01-01")
+    assert term_end("2025-07-01") == pd.Timestamp("2025-12-31")
+
+
+def test_compact_splits_a_legacy_snapshot_into_months(storage):
+    pytest.importorskip("pyarrow")
+    from attendance_core.snapshot import write_snapshot
+
+    write_snapshot(pd.concat([marks(), marks(day="2025-07-01")]), storage.snapshot_path)
+    storage.append_attendance(marks(students=("S1",), status="A"))
+    expected = live(storage)
+    storage.compact()
+    assert not os.path.exists(storage.snapshot_path)
+    assert [part.label for part in list_partitions(storage.partitions_dir)] == ["2025-06", "2025-07"]
+    assert live(storage) == expected
+
+
+def test_archive_seals_past_terms(storage):
+    pytest.importorskip("pyarrow")
+    storage.append_attendance(marks())
+    storage.append_attendance(marks(day="2026-01-05"))
+    storage.compact()
+    storage.append_attendance(marks(hours=(2,), day=DAY))  # pending in the log when the term is sealed
+
+    sealed = storage.archive(before="2025-12-01")
+    assert [(part.label, count) for part, count in sealed.items()] == [("2025-06", 4)]
+    parts = {part.label: part for part in list_partitions(storage.partitions_dir)}
+    assert parts["2025-06"].sealed and not parts["2026-01"].sealed
+    assert not os.stat(parts["2025-06"].path).st_mode & 0o222
+    assert all(part.sealed or part.start.year == 2026 for part in list_partitions(storage.rollup_partitions_dir))
+
+    assert len(live(storage, from_date=DAY, to_date=DAY)) == 4
+    assert rollup(storage, from_date=DAY, to_date=DAY) == {("S1", DAY, "P"): 2, ("S2", DAY, "P"): 2}
+    with pytest.raises(ValueError, match="archived"):
+        storage.append_attendance(marks(status="A"))
+    with pytest.raises(ValueError, match="archived"):
+        storage.delete_attendance(marks())
+    storage.append_attendance(marks(day="2026-01-05", status="A"))
+    assert set(live(storage, from_date="2026-01-01").values()) == {"A"}
+    assert storage.archive(before="2025-12-01") == {}
@@ -0,0 +1,62 @@
+"""Department reports from the daily rollup, checked against the original per-record computation."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from attendance_core.reports import department_students, report_course_ids, summarize
+from attendance_core.rollup import rollup_delta
+from attendance_core.schema import STATUSES
+
+STUDENTS = pd.DataFrame({"student_id": [f"S{i}" for i in range(12)], "name": [f"Student {i}" for i in range(12)],
+                         "major_course": ["PHY", "CHEM", "MATH"] * 4})
+CAMP_DAYS = pd.DataFrame({"student_id": ["S1", "S4", "S4"], "start_date": ["2025-06-03", "2025-06-01", "2025-06-20"],
+                          "end_date": ["2025-06-05", "2025-06-02", "2025-06-21"], "activity": ["NSS", "NCC", "NCC"]})
+
+
+def random_attendance(seed=0, rows=2000):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": pd.Timestamp("2025-06-01") + pd.to_timedelta(rng.integers(0, 30, rows), unit="D"),
+        "hour": rng.integers(0, 7, rows),
+        # S11 never has a record and must still be listed.
+        "course_id": rng.choice(["PHY", "CHEM", "MATH", "ENG"], rows),
+        "student_id": rng.choice(STUDENTS["student_id"][:-1], rows),
+        "status": rng.choice(STATUSES, rows, p=[0.6, 0.25, 0.05, 0.05, 0.05]),
+    })
+
+
+def legacy_report(attendance, students, camp_days, department=None):
+    """The Department-wise Report as the app computed it before the rollup existed."""
+    camp_set = set()
+    for _, row in camp_days.iterrows():
+        for d in pd.date_range(row["start_date"], row["end_date"]):
+            camp_set.add((row["student_id"], d.strftime("%Y-%m-%d")))
+    filtered = attendance.copy()
+    filtered["date_str"] = filtered["date"].dt.strftime("%Y-%m-%d")
+    filtered = filtered[~filtered.apply(lambda x: (x["student_id"], x["date_str"]) in camp_set, axis=1)]
+    dept_students = students[students["major_course"] == department] if department else students
+    final_data = filtered[filtered["student_id"].isin(dept_students["student_id"])]
+    summary = final_data.groupby("student_id")["status"].agg([
+        ("attended", lambda x: (x != "A").sum()),
+        ("total", "count")
+    ]).reset_index()
+    summary["percent"] = (summary["attended"] / summary["total"] * 100).round(1)
+    report = pd.merge(dept_students, summary, on="student_id", how="left").fillna(0)
+    report["attended"] = report["attended"].astype(int)
+    report["total"] = report["total"].astype(int)
+    return report
+
+
+@pytest.mark.parametrize("department", [None, "PHY", "MATH"])
+def test_summarize_matches_the_per_record_report(department):
+    attendance = random_attendance()
+    report = summarize(rollup_delta(attendance), department_students(STUDENTS, department), CAMP_DAYS)
+    expected = legacy_report(attendance, STUDENTS, CAMP_DAYS, department)
+    columns = ["student_id", "name", "attended", "total", "percent"]
+    pd.testing.assert_frame_equal(report[columns].reset_index(drop=True), expected[columns].reset_index(drop=True),
+                                  check_dtype=False)
+
+
+def test_report_courses_include_every_course_of_the_department():
+    enrollment = pd.DataFrame({"student_id": ["S0", "S0", "S3", "S1"], "course_id": ["PHY", "ENG", "MATH", "CHEM"]})
+    assert sorted(report_course_ids(department_students(STUDENTS, "PHY"), enrollment)) == ["ENG", "MATH", "PHY"]
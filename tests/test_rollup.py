@@ -0,0 +1,42 @@
+"""The daily rollup: maintained on every write and merged with its partitions on read."""
+import pandas as pd
+import pytest
+from conftest import DAY, marks, rollup
+
+from attendance_core.rollup import combine, rollup_delta, student_summary
+
+
+def test_first_write_in_empty_directory(storage):
+    assert storage.delete_attendance(marks()[["date", "hour", "course_id", "student_id"]]) == 0
+    storage.append_attendance(marks())
+    assert rollup(storage) == {("S1", DAY, "P"): 1, ("S2", DAY, "P"): 1}
+
+
+def test_combine_sums_signed_deltas_and_drops_empty_rows():
+    added = rollup_delta(marks(hours=(1, 2)))
+    removed = rollup_delta(marks(hours=(2,), students=("S2",)), sign=-1)
+    combined = combine(pd.concat([added, removed, rollup_delta(marks(hours=(1,), students=("S2",)), sign=-1)]))
+    assert combined[["student_id", "count"]].values.tolist() == [["S1", 2]]
+
+
+def test_student_summary_counts_every_status_but_absent_as_attended():
+    rows = pd.concat([rollup_delta(marks(hours=(1, 2, 3))), rollup_delta(marks(hours=(4,), status="A")),
+                      rollup_delta(marks(hours=(5,), students=("S2",), status="NSS"))])
+    summary = student_summary(combine(rows)).set_index("student_id")
+    assert summary.loc["S1"].tolist() == [3, 4, 75.0]
+    assert summary.loc["S2"].tolist() == [4, 5, 80.0]
+
+
+def test_log_counts_are_added_to_compacted_partitions(storage):
+    pytest.importorskip("pyarrow")
+    storage.append_attendance(marks(hours=(1, 2)))
+    storage.append_attendance(marks(day="2025-07-01"))
+    storage.compact()
+    storage.append_attendance(marks(hours=(2,), students=("S1",), status="A"))
+    storage.delete_attendance(marks(hours=(1, 2), students=("S2",)))
+
+    assert rollup(storage) == {("S1", DAY, "P"): 1, ("S1", DAY, "A"): 1,
+                               ("S1", "2025-07-01", "P"): 1, ("S2", "2025-07-01", "P"): 1}
+    # Untouched partition rows keep the ids from the Parquet dictionaries.
+    assert isinstance(storage.load_rollup()["student_id"].dtype, pd.CategoricalDtype)
+    assert rollup(storage, from_date="2025-07-01") == {("S1", "2025-07-01", "P"): 1, ("S2", "2025-07-01", "P"): 1}
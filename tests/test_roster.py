@@ -0,0 +1,53 @@
+"""The roster index, checked against filtering enrollment and students per lookup."""
+import numpy as np
+import pandas as pd
+
+from attendance_core.roster import RosterIndex
+
+STUDENTS = pd.DataFrame({"student_id": ["S3", "S1", "S2", "S4"], "name": ["Chitra", "Asha", "Ravi", "Dev"],
+                         "major_course": ["PHY", "PHY", "CHEM", "CHEM"]})
+ENROLLMENT = pd.DataFrame({"student_id": ["S3", "S1", "S2", "S1", "S2", "S9"],
+                           "course_id": ["PHY", "PHY", "CHEM", "ENG", "ENG", "PHY"]})
+
+
+def filtered_roster(students, enrollment, course_id):
+    """The console's original roster: isin over enrollment and students."""
+    enrolled = enrollment[enrollment["course_id"] == course_id]["student_id"].tolist()
+    roster = students[students["student_id"].isin(enrolled)][["student_id", "name"]]
+    return roster.sort_values("student_id").reset_index(drop=True)
+
+
+def test_rosters_match_filtering_per_course():
+    index = RosterIndex(STUDENTS, ENROLLMENT)
+    for course_id in ["PHY", "CHEM", "ENG", "MATH"]:
+        pd.testing.assert_frame_equal(index.roster(course_id), filtered_roster(STUDENTS, ENROLLMENT, course_id),
+                                      check_dtype=False)
+    # Enrollment rows of unknown students are left out.
+    assert index.student_ids("PHY").tolist() == ["S1", "S3"]
+
+
+def test_departments_and_lookup():
+    index = RosterIndex(STUDENTS, ENROLLMENT)
+    assert index.department_students("PHY")["student_id"].tolist() == ["S1", "S3"]
+    assert len(index.department_students()) == 4
+    assert index.department_courses("CHEM").tolist() == ["CHEM", "ENG"]
+    assert index.department_courses().tolist() == ["CHEM", "ENG", "PHY"]
+    assert index.department_courses("MATH").tolist() == []
+    lookup = index.lookup(["S2", "S9"])
+    assert lookup["name"].tolist()[0] == "Ravi" and np.isnan(lookup["name"].tolist()[1])
+
+
+def test_updated_index_rebuilds_only_the_changed_courses():
+    index = RosterIndex(STUDENTS, ENROLLMENT)
+    enrollment = pd.concat([ENROLLMENT[ENROLLMENT["course_id"] != "CHEM"],
+                            pd.DataFrame({"student_id": ["S4"], "course_id": ["ENG"]})])
+    updated = index.updated(enrollment)
+    rebuilt = RosterIndex(STUDENTS, enrollment)
+    for course_id in ["PHY", "CHEM", "ENG"]:
+        assert updated.student_ids(course_id).tolist() == rebuilt.student_ids(course_id).tolist()
+    for department in ["PHY", "CHEM"]:
+        assert updated.department_courses(department).tolist() == rebuilt.department_courses(department).tolist()
+    assert updated.department_courses().tolist() == ["ENG", "PHY"]
+    assert updated.student_ids("PHY") is index.student_ids("PHY")
+    assert index.student_ids("CHEM").tolist() == ["S2"]
+    assert index.updated(ENROLLMENT) is index
@@ -0,0 +1,42 @@
+"""Precomputed attendance percentages and the shortage list read from them."""
+import pandas as pd
+from conftest import marks
+
+from attendance_core.shortage import OVERALL, compute_percentages, read_percentages, shortage_list, write_percentages
+
+STUDENTS = pd.DataFrame({"student_id": ["S1", "S2", "S3"], "name": ["Asha", "Ravi", "Dev"],
+                         "major_course": ["PHY", "CHEM", "PHY"]})
+
+
+def test_percentages_overall_and_per_course(storage, tmp_path):
+    storage.save_table("students", STUDENTS)
+    storage.save_table("camp_days", pd.DataFrame({"student_id": ["S2"], "start_date": ["2025-06-03"],
+                                                  "end_date": ["2025-06-03"], "activity": ["NSS"]}))
+    storage.append_attendance(marks(hours=(1, 2, 3)))
+    storage.append_attendance(marks(hours=(4,), status="A", course_id="C2"))
+    storage.append_attendance(marks(hours=(1,), students=("S2",), status="A", day="2025-06-03"))  # on camp
+    storage.append_attendance(marks(hours=(1,), status="A", day="2025-07-01"))  # after as_of
+
+    percentages = compute_percentages(storage, as_of="2025-06-30")
+    rows = {(row.student_id, row.course_id): (row.attended, row.total, row.percent) for row in percentages.itertuples()}
+    assert rows == {("S1", OVERALL): (3, 4, 75.0), ("S1", "C1"): (3, 3, 100.0), ("S1", "C2"): (0, 1, 0.0),
+                    ("S2", OVERALL): (3, 4, 75.0), ("S2", "C1"): (3, 3, 100.0), ("S2", "C2"): (0, 1, 0.0)}
+    assert set(percentages["as_of"]) == {"2025-06-30"}
+
+    path = str(tmp_path / "attendance_percent.csv")
+    write_percentages(percentages, path)
+    assert read_percentages(path)[["student_id", "course_id"]].values.tolist() == \
+        percentages[["student_id", "course_id"]].values.tolist()
+    assert read_percentages(str(tmp_path / "missing.csv")) is None
+
+
+def test_shortage_list_filters_precomputed_rows():
+    percentages = pd.DataFrame({
+        "student_id": ["S1", "S1", "S2", "S2", "S3"], "name": ["Asha", "Asha", "Ravi", "Ravi", "Dev"],
+        "major_course": ["PHY", "PHY", "CHEM", "CHEM", "PHY"], "course_id": [OVERALL, "C1", OVERALL, "C1", OVERALL],
+        "attended": [7, 1, 9, 9, 0], "total": [10, 4, 10, 10, 0], "percent": [70.0, 25.0, 90.0, 90.0, 0.0],
+    })
+    assert shortage_list(percentages)["student_id"].tolist() == ["S1"]
+    assert shortage_list(percentages, threshold=95)["student_id"].tolist() == ["S1", "S2"]
+    assert shortage_list(percentages, threshold=95, department="CHEM")["student_id"].tolist() == ["S2"]
+    assert shortage_list(percentages, per_course=True)[["student_id", "course_id"]].values.tolist() == [["S1", "C1"]]
@@ -0,0 +1,37 @@
+"""Edits and deletes by key: tombstones in the log, resolved against the partitions and compacted away."""
+import os
+
+import pandas as pd
+import pytest
+from conftest import DAY, live, marks, rollup
+
+from attendance_core.marking import delete_attendance, edit_attendance
+
+
+def test_edit_and_delete_by_key(storage):
+    storage.append_attendance(marks(hours=(1, 2)))
+    rows = storage.load_attendance(student_ids=["S1"])
+    assert len(edit_attendance(storage, rows[rows["hour"] == 2], "NCC", "T2")) == 1
+    with pytest.raises(ValueError, match="Unknown attendance status"):
+        edit_attendance(storage, rows, "X", "T2")
+    assert delete_attendance(storage, marks(hours=(1,))[["date", "hour", "course_id", "student_id"]], "T2") == 2
+    assert delete_attendance(storage, marks(hours=(1,))[["date", "hour", "course_id", "student_id"]], "T2") == 0
+    assert live(storage) == {(DAY, 2, "C1", "S1"): "NCC", (DAY, 2, "C1", "S2"): "P"}
+    assert rollup(storage) == {("S1", DAY, "NCC"): 1, ("S2", DAY, "P"): 1}
+
+
+def test_upsert_and_tombstones_resolve_across_log_and_partitions(storage):
+    pytest.importorskip("pyarrow")
+    storage.append_attendance(marks())
+    storage.compact()
+    # The log now only holds the edit and the tombstone; both win over the partition.
+    storage.append_attendance(marks(students=("S1",), status="A"))
+    storage.delete_attendance(marks(students=("S2",)))
+    expected = {(DAY, 1, "C1", "S1"): "A"}
+    assert live(storage) == expected
+    assert rollup(storage) == {("S1", DAY, "A"): 1}
+
+    storage.compact()
+    assert live(storage) == expected
+    assert rollup(storage) == {("S1", DAY, "A"): 1}
+    assert pd.read_csv(os.path.join(storage.data_dir, "attendance.csv")).empty
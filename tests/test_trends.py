@@ -0,0 +1,52 @@
+"""Trend and heatmap buckets, and the storage periods they are cached by."""
+import pandas as pd
+import pytest
+from conftest import marks
+
+from attendance_core.marking import EXTRA_HOUR
+from attendance_core.rollup import rollup_delta
+from attendance_core.trends import day_buckets, heatmap, hour_buckets, trend
+
+STUDENTS = pd.DataFrame({"student_id": ["S1", "S2"], "name": ["Asha", "Ravi"], "major_course": ["PHY", "CHEM"]})
+CAMP_DAYS = pd.DataFrame({"student_id": ["S2"], "start_date": ["2025-06-03"], "end_date": ["2025-06-03"],
+                          "activity": ["NSS"]})
+
+
+def attendance(*frames):
+    rows = pd.concat(frames, ignore_index=True)
+    return rows.assign(date=pd.to_datetime(rows["date"]))
+
+
+def test_trend_regroups_day_buckets_by_week_and_month():
+    rows = attendance(marks(day="2025-06-02"), marks(day="2025-06-03", status="A"), marks(day="2025-06-09"),
+                      marks(day="2025-07-01", students=("S1",)))
+    buckets = day_buckets(rollup_delta(rows), STUDENTS, CAMP_DAYS)
+    # S2's absence on 3 June falls on a camp day and is not counted.
+    weekly = trend(buckets, "W")
+    assert weekly[["attended", "total"]].values.tolist() == [[2, 3], [2, 2], [1, 1]]
+    assert weekly.index[0] == pd.Timestamp("2025-06-02")
+    monthly = trend(buckets, "M", department="PHY")
+    assert monthly["percent"].tolist() == [66.7, 100.0]
+    assert trend(buckets, "M", from_date="2025-08-01").empty
+
+
+def test_heatmap_folds_every_extra_class_into_one_column():
+    rows = attendance(marks(hours=(1, EXTRA_HOUR, 7)), marks(hours=(8,), status="A"))
+    cells = heatmap(hour_buckets(rows, STUDENTS))
+    assert cells[["hour", "attended", "total", "percent"]].values.tolist() == [
+        [EXTRA_HOUR, 4, 6, 66.7], [1, 2, 2, 100.0]]
+    assert heatmap(hour_buckets(rows, STUDENTS), department="CHEM")["total"].tolist() == [3, 1]
+
+
+def test_a_write_changes_only_the_periods_it_touches(storage):
+    pytest.importorskip("pyarrow")
+    storage.append_attendance(marks())
+    storage.append_attendance(marks(day="2025-07-01"))
+    storage.compact()
+    before = storage.attendance_periods("2025-06-10")
+    assert [(f"{start:%Y-%m-%d}", f"{end:%Y-%m-%d}") for start, end, _ in before] == [
+        ("2025-06-10", "2025-06-30"), ("2025-07-01", "2025-07-31")]
+
+    storage.append_attendance(marks(status="A", day="2025-07-01"))
+    after = storage.attendance_periods("2025-06-10")
+    assert after[0] == before[0] and after[1] != before[1]
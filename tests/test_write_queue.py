@@ -0,0 +1,73 @@
+"""Journaled submissions through the write queue, and appends that fail half-way."""
+import json
+import os
+
+import pytest
+from conftest import DAY, live, marks, rollup
+
+from attendance_core import storage as storage_module
+from attendance_core.storage import ATTENDANCE_COLUMNS
+from attendance_core.write_queue import WriteQueue, _journal_entries
+
+
+def test_submissions_are_written_and_the_journal_settles(storage, tmp_path):
+    journal = str(tmp_path / "attendance.journal")
+    writer = WriteQueue(storage, journal)
+    futures = [writer.submit(marks(hours=(hour,))) for hour in (1, 2)]
+    assert [len(future.result(timeout=10)) for future in futures] == [2, 2]
+    assert storage.taken_hours("C1", DAY) == [1, 2]
+    assert _journal_entries(journal)[0] == {}
+
+
+def test_journal_replays_pending_submissions_once(storage, tmp_path):
+    journal = str(tmp_path / "attendance.journal")
+    pending, written = marks(students=("S1",)), marks(students=("S2",))
+    with open(journal, "w") as fh:
+        fh.write(json.dumps({"id": "a", "rows": pending[ATTENDANCE_COLUMNS].to_dict("records")}) + "\n")
+        fh.write(json.dumps({"id": "b", "rows": written[ATTENDANCE_COLUMNS].to_dict("records")}) + "\n")
+        fh.write(json.dumps({"done": ["b"]}) + "\n")
+        fh.write('{"id": "c", "rows": [{"da')  # torn by a crash
+
+    assert WriteQueue(storage, journal).replayed == 1
+    assert live(storage) == {(DAY, 1, "C1", "S1"): "P"}
+    assert _journal_entries(journal)[0] == {}
+    # The done marker was not glued onto the torn line, so nothing is replayed again.
+    storage.delete_attendance(pending)
+    assert WriteQueue(storage, journal).replayed == 0
+    assert live(storage) == {}
+
+
+def test_a_failed_rollup_append_rolls_back_the_attendance_row(storage, monkeypatch):
+    storage.append_attendance(marks())
+    sizes = {name: os.path.getsize(os.path.join(storage.data_dir, name))
+             for name in ("attendance.csv", "attendance_daily.csv")}
+    append = storage_module._append_csv_unlocked
+
+    def append_attendance_only(df, path):
+        if path.endswith("attendance_daily.csv"):
+            raise OSError("disk full")
+        append(df, path)
+
+    monkeypatch.setattr(storage_module, "_append_csv_unlocked", append_attendance_only)
+    with pytest.raises(OSError):
+        storage.append_attendance(marks(students=("S1",), status="A"))
+    assert {name: os.path.getsize(os.path.join(storage.data_dir, name)) for name in sizes} == sizes
+
+    monkeypatch.setattr(storage_module, "_append_csv_unlocked", append)
+    storage.append_attendance(marks(students=("S1",), status="A"))
+    assert rollup(storage) == {("S1", DAY, "A"): 1, ("S2", DAY, "P"): 1}
+
+
+def test_writer_survives_a_failed_compaction(storage, tmp_path):
+    attempts = []
+
+    def compact():
+        attempts.append(1)
+        raise OSError("disk full")
+
+    storage.compact = compact
+    writer = WriteQueue(storage, str(tmp_path / "attendance.journal"), compact_bytes=1)
+    for hour in (1, 2, 3):
+        assert len(writer.submit(marks(hours=(hour,))).result(timeout=10)) == 2
+    assert attempts and writer._thread.is_alive()
+    assert storage.taken_hours("C1", DAY) == [1, 2, 3]